@@ -36,6 +36,11 @@ class Cfg:
     the EFFIC value correctly, and this scaling will not be necessary anymore.
     """
     
+    qstat_ttl = 60
+    """ Time to live [s] of the qstat data fetched by *Sampler.refresh_qstat*:
+    refresh requests within this window are served from the cache instead of
+    querying the batch server again. """
+
     verbose = False
 
     offline = False
@@ -5,33 +5,40 @@ Classes and functions
 =====================
 
 """
-#===============================================================================    
+import functools
+#===============================================================================
+@functools.lru_cache(maxsize=None)
+def _hopper_node_mem_avail_gb(node):
+    """
+    Memory [GB] available on a single Hopper compute node. Memoized: the same
+    node names are looked up for every details build of every job on them, and
+    the node pool is small.
+    """
+    r = node[1]
+    if r!='5':
+        return 58
+    c = node[3]
+    if not c in '123':
+        return 58
+    cn = node[7]
+    if not cn in '12345678':
+        return 58
+    return 256 # r5c[1-3]cn0[1-8]
+#===============================================================================
 def hopper_mem_avail_gb(node):
     """
     Return the memory available on a compute node on Hopper.
-    
+
     :param str node: name of a compute node.
-    :return: number of GB of memory available to the user on that node. 
-    
-    If *node* is a list of node names the total memory available is summed over 
-    the nodes in the list. 
+    :return: number of GB of memory available to the user on that node.
+
+    If *node* is a list of node names the total memory available is summed over
+    the nodes in the list.
     """
     if isinstance(node,str):
-        r = node[1]
-        if r!='5':
-            return 58
-        c = node[3]
-        if not c in '123':
-            return 58
-        cn = node[7]
-        if not cn in '12345678':
-            return 58
-        return 256 # r5c[1-3]cn0[1-8]
+        return _hopper_node_mem_avail_gb(node)
     elif isinstance(node,list):
-        mem = 0
-        for ni in node:
-            mem += hopper_mem_avail_gb(ni)
-        return mem
+        return sum( map(_hopper_node_mem_avail_gb,node) )
     else:
         raise TypeError('Expected str, or list of str, got '+str(type(node)))
 #===============================================================================
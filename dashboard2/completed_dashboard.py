@@ -24,82 +24,178 @@ classes and functions
 
 """
 from PyQt4 import QtGui,QtCore,uic
-import sys,os,argparse,glob,shutil
+import sys,os,argparse,shutil
+from operator import itemgetter
 
 from mail import address_of
 from ignoresignals import IgnoreSignals
 import remote
 from titleline import title_line
-from mycollections import od_first, od_last
+from mycollections import OrderedDict
 import showq
 from cfg import Cfg
 # from is_ojm_running import is_ojm_running
 
 #===================================================================================================
-def completed_jobs_by_user(arg):
+def list_completed_reports(folder,suffix='.pickled.gz'):
     """
-    sort key for sorting finished jobs by username
-    """
-    return arg.split(' ',1)[0].split('_',1)[0]
-#===================================================================================================
-def completed_jobs_by_jobid(arg):
-    """
-    sort key for sorting finished jobs by jobid
+    List the paths of the report files (*<username>_<jobid>_<timestamp>.pickled.gz*) in *folder*.
+
+    Uses :func:`os.scandir` rather than :func:`glob.glob`: the *DirEntry* objects carry the
+    file type from the directory listing, and a suffix check is cheaper than fnmatch, which
+    matters once the folder holds thousands of reports.
     """
-    return arg.split(' ',1)[0].split('_',2)[1]
+    try:
+        with os.scandir(folder) as it:
+            return [ os.path.join(folder,entry.name) for entry in it
+                     if entry.name.endswith(suffix) and entry.is_file(follow_symlinks=False) ]
+    except FileNotFoundError:
+        return []
 #===================================================================================================
-def completed_jobs_by_time(arg):
+def completed_jobs_sort_record(overview_line):
     """
-    sort key for sorting finished jobs by username
+    Decorate an overview line with its sort keys: *(username,jobid,timestamp,overview_line)*.
+    The keys are split off once, so that sorting the records (with :func:`operator.itemgetter`)
+    does not have to re-split the line on every comparison.
     """
-    return arg.split(' ',1)[0].split('_',3)[2]#.split('.',1)[0]
+    words = overview_line.split(' ',1)[0].split('_',3)
+    return (words[0],words[1],words[2],overview_line)
 #===================================================================================================
 class JobHistory:
     """
     Wrapper class for *showq.Job*
-     
+
     :param str filepath: path to report file *<username>_<jobid>_<timestamp>.pickled*.
+
+    Only the report header is built up front. The details text of a timestamp is
+    formatted lazily, on the first visit of that timestamp (see :func:`get_sample_text`),
+    so that selecting a job in the overview does not pay for samples that are never
+    looked at.
     """
-    #---------------------------------------------------------------------------------------------------------         
+    __slots__ = ('job','filepath','address','header','timestamps','nsamples','sample_texts','current_timestamp')
+    #---------------------------------------------------------------------------------------------------------
     def __init__(self,filepath):
         self.job = showq.unpickle(filepath)
         self.filepath = filepath
-        self.timestamp_begin = []
-        line = 1
         self.address = self.job.address
         if not self.job.address:
             self.address = address_of(self.job.username)
-        text = title_line('JOB MONITOR REPORT '+self.job.jobid,width=100, char='=',above=True)
-        text += '\n'+self.address+'\n'
-        text += 'Overall efficiency: ??{:5.2f}??%\n'.format(self.job.get_sample().get_effic())
-        # todo : this should perhaps come from trace job? otherwise it is erroneous.
-        text += 'Overall memory use: ??{}?? GB\n'.format(round(self.job.overall_memory_used(),3))
-        # tod  this as well?
-        sample = od_first(self.job.samples)[1] 
+        parts = [ title_line('JOB MONITOR REPORT '+self.job.jobid,width=100, char='=',above=True)
+                , '\n'+self.address+'\n'
+                , 'Overall efficiency: ??{:5.2f}??%\n'.format(self.job.get_sample().get_effic())
+                # todo : this should perhaps come from trace job? otherwise it is erroneous.
+                , 'Overall memory use: ??{}?? GB\n'.format(round(self.job.overall_memory_used(),3))
+                # tod  this as well?
+                ]
+        sample = next(iter(self.job.samples.values()))
         nnodes = sample.get_nnodes()
         ncores = sample.get_ncores()
-        text += '       nodes|cores: {}|{}\n'.format(nnodes,ncores)
-        walltime = od_last(self.job.samples)[1].walltime(hours=True)
-        nodedays = od_last(self.job.samples)[1].nodedays()
-        text += 'walltime, nodedays: {}, {}\n'.format(walltime,nodedays)        
-        for i,timestamp in enumerate(self.job.timestamps()):
-            text += '\n'+title_line(          char='=',width=100) \
-                        +title_line(timestamp,char='=',width=100)
-            self.timestamp_begin.append(line)
-            timestamp_details = self.job.get_details(timestamp)
+        parts.append('       nodes|cores: {}|{}\n'.format(nnodes,ncores))
+        last_sample = self.job.get_sample()
+        walltime = last_sample.walltime(hours=True)
+        nodedays = last_sample.nodedays()
+        parts.append('walltime, nodedays: {}, {}\n'.format(walltime,nodedays))
+        self.header = ''.join(parts)
+        self.timestamps = tuple(self.job.timestamps())
+        self.nsamples = len(self.timestamps)
+        self.sample_texts = {} # {sample index:formatted details text}
+        self.current_timestamp = 0
+    #---------------------------------------------------------------------------------------------------------
+    def get_sample_text(self,i):
+        """
+        Return the details text (header plus the details of one timestamp) for sample *i*,
+        formatting it on the first visit and caching it for later visits.
+
+        :param int i: index of the sample, negative indices count from the end.
+        """
+        text = self.sample_texts.get(i)
+        if text is None:
+            timestamp = self.timestamps[i]
+            head,script = self.job.get_details_parts(timestamp)
+            if i==0:
+                # the script only appears in the first sample.
+                timestamp_details = head+script
+            else:
+                timestamp_details = head
             if not timestamp_details:
                 timestamp_details = '... no issues here ...'
             timestamp_details += '\n'
-            if i>0: # remove the script, it already appears in the first sample.
-                pos = timestamp_details.find('--- Script')
-                if pos > -1:
-                    timestamp_details = timestamp_details[:pos]
-            line += timestamp_details.count('\n') + 1
-            text += timestamp_details
-        text += '\n'+title_line(char='=',width=100)
-        self.details = text
-        self.current_timestamp = 0
-    #---------------------------------------------------------------------------------------------------------         
+            text = ''.join(( self.header
+                           , '\n'+title_line(          char='=',width=100)
+                                 +title_line(timestamp,char='=',width=100)
+                           , timestamp_details
+                           , '\n'+title_line(char='=',width=100)
+                           ))
+            self.sample_texts[i] = text
+        return text
+    #---------------------------------------------------------------------------------------------------------
+
+#===================================================================================================
+class JobHistoryLoader(QtCore.QRunnable):
+    """
+    QRunnable that builds a :class:`JobHistory` from a report file on a worker thread
+    of the global QThreadPool, so that unpickling and formatting a large job does not
+    freeze the gui. The result is delivered through the *loaded* signal.
+
+    :param str filepath: path to the report file.
+    :param str filename: name of the report file (passed along with the result).
+    """
+    class Signals(QtCore.QObject):
+        """ Signal holder (QRunnable itself cannot emit signals). """
+        loaded = QtCore.pyqtSignal(object,str)
+    #---------------------------------------------------------------------------------------------------------
+    def __init__(self,filepath,filename):
+        super(JobHistoryLoader, self).__init__()
+        self.filepath = filepath
+        self.filename = filename
+        self.signals = JobHistoryLoader.Signals()
+    #---------------------------------------------------------------------------------------------------------
+    def run(self):
+        try:
+            jobh = JobHistory(self.filepath)
+        except Exception as e:
+            print('failed to load',self.filepath,':',type(e),e)
+            jobh = None
+        self.signals.loaded.emit(jobh,self.filename)
+    #---------------------------------------------------------------------------------------------------------
+
+#===================================================================================================
+class OverviewModel(QtCore.QAbstractListModel):
+    """
+    List model exposing the overview lines to the qwOverview QListView. Sorting or
+    refreshing replaces the row list in one model reset, instead of rebuilding (and
+    letting Qt re-layout) a plain text document, and a selected row directly
+    identifies its report file.
+    """
+    #---------------------------------------------------------------------------------------------------------
+    def __init__(self,parent=None):
+        super(OverviewModel, self).__init__(parent)
+        self.rows = []
+    #---------------------------------------------------------------------------------------------------------
+    def rowCount(self,parent=QtCore.QModelIndex()):
+        return len(self.rows)
+    #---------------------------------------------------------------------------------------------------------
+    def data(self,index,role=QtCore.Qt.DisplayRole):
+        if index.isValid() and role==QtCore.Qt.DisplayRole:
+            return self.rows[index.row()]
+        return None
+    #---------------------------------------------------------------------------------------------------------
+    def set_rows(self,rows):
+        """
+        Replace all rows by the list *rows* (kept by reference, not copied).
+        """
+        self.beginResetModel()
+        self.rows = rows
+        self.endResetModel()
+    #---------------------------------------------------------------------------------------------------------
+    def update_row(self,i,text):
+        """
+        Change the text of row *i*.
+        """
+        self.rows[i] = text
+        index = self.index(i)
+        self.dataChanged.emit(index,index)
+    #---------------------------------------------------------------------------------------------------------
 
 #===================================================================================================
 def default_local_folder(analyze_offline_data):
@@ -122,10 +218,13 @@ class CompletedDashboard(QtGui.QMainWindow):
     :param str local_folder: relative path to the local folder where we start out.
     
     Less useful arguments:
-     
+
     :param bool verbose: more or less printing.
     """
-    #---------------------------------------------------------------------------------------------------------         
+    jobh_cache_maxsize = 32
+    """ Maximum number of JobHistory objects (with their formatted details) kept in
+    memory; beyond this the least recently viewed one is dropped. """
+    #---------------------------------------------------------------------------------------------------------
     def __init__(self,offline=False,local_folder='',verbose=False):
         super(CompletedDashboard, self).__init__()
         # file 'completed_dashboard.ui' cam be modifed using qt creator
@@ -144,6 +243,9 @@ class CompletedDashboard(QtGui.QMainWindow):
         
         self.ignore_signals = False
         self.current_jobh = None
+        self.jobh_cache = OrderedDict() # {filename:JobHistory}, least recently viewed first
+        self.loading = set()            # filenames currently being built on a worker thread
+        self.requested_filename = ''    # filename the user selected last
         
         font = QtGui.QFont()
         font.setFamily('Monaco')
@@ -151,6 +253,10 @@ class CompletedDashboard(QtGui.QMainWindow):
         self.ui.qwOverview.setFont(font)
         self.ui.qwDetails .setFont(font)
 
+        self.overview_model = OverviewModel(self)
+        self.ui.qwOverview.setModel(self.overview_model)
+        self.ui.qwOverview.selectionModel().currentChanged.connect(self.on_qwOverview_currentChanged)
+
         if self.analyze_offline_data:
             os.makedirs(os.path.join(self.local_folder,'issues'    ),exist_ok=True)
             os.makedirs(os.path.join(self.local_folder,'non_issues'),exist_ok=True)
@@ -177,11 +283,10 @@ class CompletedDashboard(QtGui.QMainWindow):
         Retrieve reports of completed jobs to *self.local_folder*.
         """
         print('Retrieving reports of completed jobs ...')
-        self.map_filename_job = {}
         pattern = '*.pickled.gz'
         if self.analyze_offline_data:
             # list files that are already local
-            filenames_local = glob.glob(os.path.join(self.local_folder,pattern))
+            filenames_local = list_completed_reports(self.local_folder)
             self.n_entries = len(filenames_local)            
             print('Found {} local reports of completed jobs.'.format(self.n_entries))
             if self.fetch_remote:
@@ -217,13 +322,10 @@ class CompletedDashboard(QtGui.QMainWindow):
                             remote.err_print(type(e),e)
                             continue
         else:
-            filenames_local = glob.glob(os.path.join(self.local_folder,pattern))
-            
-        for filepath in filenames_local:
-            filename = filepath.rsplit('/')[-1]
-            self.map_filename_job[filename] = None
-        
-        self.overview_lines = list(self.map_filename_job.keys())
+            filenames_local = list_completed_reports(self.local_folder)
+
+        self.overview_lines = [filepath.rsplit('/')[-1] for filepath in filenames_local]
+        self.overview_records = [completed_jobs_sort_record(line) for line in self.overview_lines]
         if self.overview_lines:
             self.sort_overview()
         print('Retrieving reports of completed jobs ... done')
@@ -266,62 +368,61 @@ class CompletedDashboard(QtGui.QMainWindow):
         Sort the overview according to selected key and order.
         """
         if self.ui.qwOverviewUser.isChecked():
-            sort_key = completed_jobs_by_user
+            sort_key = itemgetter(0)
         elif self.ui.qwOverviewJobid.isChecked():
-            sort_key = completed_jobs_by_jobid
+            sort_key = itemgetter(1)
         elif self.ui.qwOverviewTime.isChecked():
-            sort_key = completed_jobs_by_time
+            sort_key = itemgetter(2)
         else:
             return
-        self.overview_lines.sort(key=sort_key,reverse=self.ui.qwOverviewReverse.isChecked())
-        self.show_overview()
+        self.overview_records.sort(key=sort_key,reverse=self.ui.qwOverviewReverse.isChecked())
+        self.overview_lines = [record[3] for record in self.overview_records]
+        # keep the selected job selected - a sort only reorders known lines, so
+        # look up where the current report file ended up and reselect that row.
+        select_row = None
+        if self.requested_filename:
+            for i,line in enumerate(self.overview_lines):
+                if line.split(' ',1)[0]==self.requested_filename:
+                    select_row = i
+                    break
+        self.show_overview(select_row=select_row)
     #---------------------------------------------------------------------------------------------------------         
-    def show_overview(self,select_lineno=0):
+    def show_overview(self,select_row=None):
         """
-        Show the overview text and select line *select_lineno*.
-        
-        :param int select_lineno: line number to select (and for which the details will be shown). 
+        Hand the overview lines to the overview model and select row *select_row*.
+
+        :param int select_row: row number to select (and for which the details will be shown).
         """
-        text = '\n'
-        text+= '\n'.join(self.overview_lines)
-        self.ui.qwOverview.setPlainText(text)
-        if select_lineno != 0:
-            self.overview_move_cursor_to(select_lineno)
-    #---------------------------------------------------------------------------------------------------------         
-    def on_qwOverview_cursorPositionChanged(self):
+        self.overview_model.set_rows(self.overview_lines)
+        if select_row is not None:
+            self.overview_move_cursor_to(select_row)
+    #---------------------------------------------------------------------------------------------------------
+    def on_qwOverview_currentChanged(self,current,previous):
         """
-        Slot for when the cursor in the overview changes position.
+        Slot for when the selected row in the overview changes.
         """
         if self.ignore_signals:
 #             print('ignored')
             return
-#         print('on_qwOverview_cursorPositionChanged')
-        cursor = self.ui.qwOverview.textCursor()
-        cursor.select(QtGui.QTextCursor.LineUnderCursor)
-        overview_line = cursor.selectedText()
-        with IgnoreSignals(self):
-            self.ui.qwOverview.setTextCursor(cursor)
-        print('selected:',overview_line)
+        if not current.isValid():
+            self.show_details('')
+            return
+        overview_line = self.overview_model.rows[current.row()]
+        if self.verbose:
+            print('selected:',overview_line)
         filename = overview_line.split(' ',1)[0]
         self.show_details(filename)
     #---------------------------------------------------------------------------------------------------------
-    def overview_move_cursor_to(self,lineno,ignore=True):
-        """
-        Move the cursor in the overview to line *lineno*.
-        """
-        cursor = self.ui.qwOverview.textCursor()
-        i=0
-        while i<lineno:
-            cursor.movePosition(QtGui.QTextCursor.Down)
-            i+=1
-            
-        cursor.select(QtGui.QTextCursor.LineUnderCursor)
-        self.overview_lineno = lineno
+    def overview_move_cursor_to(self,row,ignore=True):
+        """
+        Move the selection in the overview to row *row*.
+        """
+        index = self.overview_model.index(row)
         if ignore:
             with IgnoreSignals(self):
-                self.ui.qwOverview.setTextCursor(cursor)
-        else:                    
-            self.ui.qwOverview.setTextCursor(cursor)
+                self.ui.qwOverview.setCurrentIndex(index)
+        else:
+            self.ui.qwOverview.setCurrentIndex(index)
     #---------------------------------------------------------------------------------------------------------
     def append_to_overview_line(self,filename,s):
         """
@@ -331,42 +432,78 @@ class CompletedDashboard(QtGui.QMainWindow):
             for i in range(len(self.overview_lines)):
                 if self.overview_lines[i].startswith(filename):
                     line = self.overview_lines[i]
+                    if s in line:
+                        # already appended (e.g. for a report that was evicted from the
+                        # cache and rebuilt)
+                        break
                     if not s[0]==' ':
                         line += ' '
                     line += s
                     self.overview_lines[i] = line
-                    self.show_overview(select_lineno=i+1) # first line is empty       
+                    self.overview_records[i] = self.overview_records[i][:3]+(line,)
+                    self.overview_model.update_row(i,line)
+                    if filename == self.requested_filename:
+                        # only move the selection for the report the user is
+                        # looking at - loads finishing in the background must
+                        # not yank the cursor away.
+                        self.overview_move_cursor_to(i)
                     break
     #---------------------------------------------------------------------------------------------------------
     # qwDetails handling
     #---------------------------------------------------------------------------------------------------------             
     def show_details(self,filename):
         """
-        Show the details of report file *filename*.
+        Show the details of report file *filename*. If the report is not cached yet it
+        is built by a :class:`JobHistoryLoader` on a worker thread and shown when ready.
         """
         if filename:
-            jobh = self.map_filename_job[filename]
+            self.requested_filename = filename
+            jobh = self.jobh_cache.get(filename)
             if jobh is None:
-                #create it from the corresponding .pickled file 
-                jobh = JobHistory( os.path.join(self.local_folder,filename) )
-                #and store it for later reference
-                self.map_filename_job[filename] = jobh
-                #augment file name in overview:
-                job = jobh.job
-                extra = ' warnings={}/{}, {}'.format( job.nsamples_with_warnings, job.nsamples()
-                                                    , job.jobscript.loaded_modules(short=True) )
-                self.append_to_overview_line(filename,extra)
+                if filename in self.loading:
+                    return # already being built
+                self.loading.add(filename)
+                loader = JobHistoryLoader( os.path.join(self.local_folder,filename), filename )
+                loader.signals.loaded.connect(self.on_job_history_loaded)
+                QtCore.QThreadPool.globalInstance().start(loader)
             else:
+                self.jobh_cache.move_to_end(filename)
                 jobh.current_timestamp = 0
-                
-            self.ui.qwDetailsJobid.setText(jobh.job.username+' '+jobh.job.jobid)
-            self.ui.qwDetails.setPlainText(jobh.details)
-            self.current_jobh = jobh # used by move_details
-            self.ui.qwDetailsNSamples.setText('{} / {}'.format(1,jobh.job.nsamples()))
-            self.ui.qwDetailsTimestamp.setText(jobh.job.timestamps()[0])
+                self.display_details(jobh)
         else:
+            self.requested_filename = ''
             self.current_jobh = None
     #---------------------------------------------------------------------------------------------------------
+    def on_job_history_loaded(self,jobh,filename):
+        """
+        Slot receiving a :class:`JobHistory` built by a :class:`JobHistoryLoader`.
+        """
+        self.loading.discard(filename)
+        if jobh is None:
+            return
+        #store it for later reference
+        self.jobh_cache[filename] = jobh
+        if len(self.jobh_cache) > self.jobh_cache_maxsize:
+            self.jobh_cache.popitem(last=False) # drop the least recently viewed
+        #augment file name in overview:
+        job = jobh.job
+        extra = ' warnings={}/{}, {}'.format( job.nsamples_with_warnings, job.nsamples()
+                                            , job.jobscript.loaded_modules(short=True) )
+        self.append_to_overview_line(filename,extra)
+        if filename == self.requested_filename:
+            # the user has not selected another report in the meantime
+            self.display_details(jobh)
+    #---------------------------------------------------------------------------------------------------------
+    def display_details(self,jobh):
+        """
+        Populate the details pane from *jobh*.
+        """
+        self.ui.qwDetailsJobid.setText(jobh.job.username+' '+jobh.job.jobid)
+        self.ui.qwDetails.setPlainText(jobh.get_sample_text(0))
+        self.current_jobh = jobh # used by move_details
+        self.ui.qwDetailsNSamples.setText('{} / {}'.format(1,jobh.nsamples))
+        self.ui.qwDetailsTimestamp.setText(jobh.timestamps[0])
+    #---------------------------------------------------------------------------------------------------------
     def on_qwDetailsFirst_pressed(self):
         """
         Navigate between samples in job details: to first sample.
@@ -410,34 +547,23 @@ class CompletedDashboard(QtGui.QMainWindow):
         :param int index: to sample with number *index*.
         :param int delta: move *|delta|* samples ahead (or back, if *delta* is negative).
         """
+        if self.current_jobh is None:
+            return # no report shown (or one is still being built)
         i = index
         if delta:
             i = self.current_jobh.current_timestamp + delta
             # make sure index i is in the valid range.
             i = max(0,i)
-            i = min(i,self.current_jobh.job.nsamples()-1)
+            i = min(i,self.current_jobh.nsamples-1)
         self.current_jobh.current_timestamp = i
-        nsamples = self.current_jobh.job.nsamples()
+        nsamples = self.current_jobh.nsamples
         if i > -1:
             j = i+1
         else:
             j=nsamples
         self.ui.qwDetailsNSamples.setText('{} / {}'.format(j,nsamples))
-        self.ui.qwDetailsTimestamp.setText(self.current_jobh.job.timestamps()[i])
-        line = self.current_jobh.timestamp_begin[i]
-        cursor = self.ui.qwDetails.textCursor()
-        current_block = cursor.blockNumber()
-        nlines_to_move = line - current_block
-        if nlines_to_move > 0:
-            moveop = QtGui.QTextCursor.Down
-        elif nlines_to_move < 0:
-            nlines_to_move = -nlines_to_move
-            moveop = QtGui.QTextCursor.Up
-        else:
-            moveop = QtGui.QTextCursor.NoMove
-        cursor.movePosition(moveop,n=nlines_to_move)
-        cursor.select(QtGui.QTextCursor.LineUnderCursor)
-        self.ui.qwDetails.setTextCursor(cursor)
+        self.ui.qwDetailsTimestamp.setText(self.current_jobh.timestamps[i])
+        self.ui.qwDetails.setPlainText(self.current_jobh.get_sample_text(i))
 
     #---------------------------------------------------------------------------------------------------------
     def on_qwMail_pressed(self):
@@ -447,7 +573,8 @@ class CompletedDashboard(QtGui.QMainWindow):
         if self.current_jobh is None:
             return
         address = address_of(self.username)
-        print(address)
+        if self.verbose:
+            print(address)
         clipboard = QtGui.qApp.clipboard()
         clipboard.setText(address)
     #---------------------------------------------------------------------------------------------------------
@@ -457,7 +584,7 @@ class CompletedDashboard(QtGui.QMainWindow):
         We will probably never look at it again  
         """
         self.archive_current_job('non_issues')
-        self.overview_move_cursor_to(1,ignore=False)
+        self.overview_move_cursor_to(0,ignore=False)
     #---------------------------------------------------------------------------------------------------------
     def on_qwArchiveToIssues_pressed(self):
         """
@@ -465,7 +592,7 @@ class CompletedDashboard(QtGui.QMainWindow):
         We might revisit this one to study the problem further or to follow up on this user/type of job.   
         """
         self.archive_current_job('issues')
-        self.overview_move_cursor_to(1,ignore=False)
+        self.overview_move_cursor_to(0,ignore=False)
     #---------------------------------------------------------------------------------------------------------
     def archive_current_job(self,archive):
         """
@@ -476,7 +603,8 @@ class CompletedDashboard(QtGui.QMainWindow):
             filename = dest[-1]
             dest.insert(-1,archive)
             dest = os.path.join(*dest)
-            print('Archived:',self.current_jobh.filepath,'>',dest)
+            if self.verbose:
+                print('Archived:',self.current_jobh.filepath,'>',dest)
             shutil.move(self.current_jobh.filepath,dest)
             self.current_jobh.filepath = dest
             self.append_to_overview_line(filename,' archived > '+archive)
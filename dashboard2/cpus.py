@@ -131,7 +131,7 @@ def list_cores(compute_node,jobid):
     
     .. note:: not used anymore. 
     """
-    lines = remote.run('ssh {} cat /dev/cpuset/torque/{}.hopper/cpus'.format(compute_node,jobid)
+    lines = remote.run('{} {} cat /dev/cpuset/torque/{}.hopper/cpus'.format(remote.ssh,compute_node,jobid)
                       , post_processor=remote.list_of_lines
                       )
     if lines is None:
@@ -152,7 +152,7 @@ def run_sar_P(compute_node,cores=None):
     :param list cores: a list of core ids. 
     :returns: list with the relevant output lines
     """
-    command = "ssh {} sar -P ALL 1 1".format(compute_node)
+    command = "{} {} sar -P ALL 1 1".format(remote.ssh,compute_node)
     lines = remote.run(command,post_processor=remote.list_of_lines)
     if lines is None:
         lines = ['command failed: '+command]
@@ -179,7 +179,7 @@ def run_sar_P(compute_node,cores=None):
 
 #===============================================================================
 def run_free(cnode):
-    command = 'ssh {} free -m'.format(cnode)
+    command = '{} {} free -m'.format(remote.ssh,cnode)
     try:
         lines = remote.run(command, attempts=1, post_processor=remote.list_of_lines, raise_exception=True)
     except:
@@ -6,50 +6,68 @@ import remote
 from titleline import title_line
 from is_ojm_running import is_ojm_running
 
-#===============================================================================    
+#===============================================================================
+section_separator = '===SPLIT==='
+#===============================================================================
 def offline_overview(only_new_completed_jobs=True):
     """
     Main functIon of the script.
     Print overview of the offline job monitorl
-    
+
     * Tests if ojm.py is running, and if not prints 'ojm.err'
     * print a list of (new) completed jobs with warnings
     * print a list of running jobs with warnings
-    
-    :param [only_new_completed_jobs]: if *True* only new completed jobs with warnings are listed, otherwise old completed jobs are listed too. 
-    
+
+    All three remote file listings are retrieved with a single remote command
+    (one ssh round trip instead of three), separated by a sentinel line and
+    split locally.
+
+    :param [only_new_completed_jobs]: if *True* only new completed jobs with warnings are listed, otherwise old completed jobs are listed too.
+
     """
-    if not is_ojm_running():
-        command = 'cat data/jobmonitor/ojm.err'
-        print(title_line(command, width=100, char='-', above=True))
-        lines = remote.run(command, post_processor=remote.list_of_lines)
-        if lines:
-            for line in lines:
-                print(line)
-        print(title_line(width=100, char='-'))
-        
-    print(title_line('Completed jobs', width=100, char='-', above=True, below=True))
     if only_new_completed_jobs:
-        command = 'cd data/jobmonitor/completed/ ; ls *.pickled'
+        completed_pattern = '*.pickled'
     else:
-        command = 'cd data/jobmonitor/completed/ ; ls *.pickle*'
-    lines = remote.run(command,post_processor=remote.list_of_non_empty_lines,attempts=1,verbose=False)
-    n = 0
-    if lines:
-        n = len(lines)
-        for line in lines:
+        completed_pattern = '*.pickle*'
+    command = 'cat data/jobmonitor/ojm.err 2>/dev/null'\
+              ' ; echo {0}'\
+              ' ; cd data/jobmonitor/completed/ && ls {1} 2>/dev/null'\
+              ' ; echo {0}'\
+              ' ; cd ../running && ls *.pickled 2>/dev/null'\
+              .format(section_separator,completed_pattern)
+    lines = remote.run(command,post_processor=remote.list_of_lines,attempts=1,verbose=False)
+    try:
+        isplit0 = lines.index(section_separator)
+        isplit1 = lines.index(section_separator,isplit0+1)
+    except (AttributeError,ValueError):
+        # the command failed (lines is None) or its output misses the
+        # separators - show empty sections instead of crashing.
+        remote.err_print('offline_overview: could not retrieve the listings.')
+        err_lines,completed_lines,running_lines = [],[],[]
+    else:
+        err_lines       = lines[:isplit0]
+        completed_lines = [line for line in lines[isplit0+1:isplit1] if line]
+        running_lines   = [line for line in lines[isplit1+1:]        if line]
+
+    if not is_ojm_running():
+        print(title_line('cat data/jobmonitor/ojm.err', width=100, char='-', above=True))
+        for line in err_lines:
             print(line)
+        print(title_line(width=100, char='-'))
+
+    print(title_line('Completed jobs', width=100, char='-', above=True, below=True))
+    for line in completed_lines:
+        print(line)
+    n = len(completed_lines)
     if only_new_completed_jobs:
         print(n,'new completed jobs with warnings.\n')
     else:
         print(n,'completed jobs (new and old) with warnings.\n')
-        
+
     print(title_line('Running jobs', width=100, char='-', above=True, below=True))
-    command = 'cd data/jobmonitor/running ; ls *.pickled'
-    lines = remote.run(command,post_processor=remote.list_of_non_empty_lines)
-    for line in lines:
+    for line in running_lines:
         print(line)
-    print(len(lines),'running jobs with warnings.\n')
+    print(len(running_lines),'running jobs with warnings.\n')
     print(title_line(width=100, char='-'))
     #---------------------------------------------------------------------------
 
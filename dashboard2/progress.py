@@ -2,12 +2,18 @@
 Print a progress bar on the terminal.
 """
 from __future__ import division
-import sys
+import sys,queue,threading
 from datetime import datetime
 
 #==================================================================================================
 # Print iterations progress
 #==================================================================================================
+# preallocated bar characters - slicing these is cheaper than building '█'*n + '-'*m on every call
+_full_bar = '█' * 200
+_dash_bar = '-' * 200
+# percentage format strings, built once per value of decimals
+_fmt_cache = {}
+#==================================================================================================
 def printProgress(iteration, total, prefix = 'Progress: ', suffix = '', decimals = 1, barLength = 50):
     """
     Call this method in a loop to print a progress bar in a terminal. Depending on how the *'\\\\r'* 
@@ -24,21 +30,63 @@ def printProgress(iteration, total, prefix = 'Progress: ', suffix = '', decimals
     if iteration==0:
         print()
     if decimals<0:
-        percents        = '{}/{}'.format(iteration,total)
-        filledLength    = int(round(barLength * iteration / float(total)))
-        bar             = '█' * filledLength + '-' * (barLength - filledLength)
-        sys.stdout.write('\r{} |{}| {} {}'.format(prefix, bar, percents, suffix)),
+        percents = '{}/{} '.format(iteration,total)
     else:
-        fmt             = "{0:." + str(decimals) + "f}"
-        percents        = fmt.format(100 * (iteration / float(total)))
-        filledLength    = int(round(barLength * iteration / float(total)))
-        bar             = '█' * filledLength + '-' * (barLength - filledLength)
-        sys.stdout.write('\r{} |{}| {}% {}'.format(prefix, bar, percents, suffix)),
+        fmt = _fmt_cache.get(decimals)
+        if fmt is None:
+            fmt = _fmt_cache.setdefault(decimals, '{0:.' + str(decimals) + 'f}% ')
+        percents = fmt.format(100 * (iteration / float(total)))
+    filledLength = int(round(barLength * iteration / float(total)))
+    bar          = _full_bar[:filledLength] + _dash_bar[:barLength - filledLength]
+    line = '\r{} |{}| {}{}'.format(prefix, bar, percents, suffix)
     if iteration == total:
-        sys.stdout.write('\n')
+        line += '\n'
+    sys.stdout.write(line)
     sys.stdout.flush()
     #---------------------------------------------------------------------------
 
+#==================================================================================================
+# writing to the terminal is synchronous and a flush can cost hundreds of µs -
+# printProgressAsync hands the update to a daemon thread through a one-slot
+# queue, so a hot loop never blocks on stdout (updates are dropped when the
+# terminal cannot keep up).
+_async_queue  = queue.Queue(maxsize=1)
+_async_thread = None
+#==================================================================================================
+def _async_writer():
+    while True:
+        args,kwargs = _async_queue.get()
+        try:
+            printProgress(*args,**kwargs)
+        finally:
+            _async_queue.task_done()
+    #---------------------------------------------------------------------------
+
+#==================================================================================================
+def printProgressAsync(*args,**kwargs):
+    """
+    As :func:`printProgress`, but the terminal write happens on a background
+    thread. If the previous update has not been written yet, this update is
+    silently dropped - use :func:`flushProgress` before printing anything else.
+    """
+    global _async_thread
+    if _async_thread is None:
+        _async_thread = threading.Thread(target=_async_writer,daemon=True)
+        _async_thread.start()
+    try:
+        _async_queue.put_nowait((args,kwargs))
+    except queue.Full:
+        pass # the terminal is behind, drop this update
+    #---------------------------------------------------------------------------
+
+#==================================================================================================
+def flushProgress():
+    """
+    Wait until all pending :func:`printProgressAsync` updates are written.
+    """
+    _async_queue.join()
+    #---------------------------------------------------------------------------
+
 #==================================================================================================
 # test code below
 #==================================================================================================
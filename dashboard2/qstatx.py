@@ -29,7 +29,34 @@ def run_qstat_f(jobid):
     return result
     #---------------------------------------------------------------------------
 
-#===============================================================================    
+#===============================================================================
+def run_qstat_f_all(jobids):
+    """
+    Runs::
+
+        > qstat -x -f <jobid1> <jobid2> ...
+
+    on a login node, querying the batch server once for all *jobids*, and
+    returns the per-job output blocks.
+
+    :param jobids: iterable of (short) job ids.
+    :return: OrderedDict {short jobid:job block}, empty if the command failed.
+    """
+    result = remote.run("qstat -x -f "+' '.join(jobids), post_processor=remote.xml_to_odict )
+    blocks = OrderedDict()
+    try:
+        job_blocks = result['Data']['Job']
+    except (TypeError,KeyError):
+        return blocks
+    if not isinstance(job_blocks,list):
+        job_blocks = [job_blocks] # only one job
+    for job_block in job_blocks:
+        jobid = job_block['Job_Id'].split('.',1)[0]
+        blocks[jobid] = job_block
+    return blocks
+    #---------------------------------------------------------------------------
+
+#===============================================================================
 class Data_qstat:
     """
     Class for storing the output of::
@@ -37,18 +64,21 @@ class Data_qstat:
         > qstat -x -f <jobid>
 
     :param str jobid: job id.
+    :param data: an already parsed job block from :func:`run_qstat_f_all`. If *None*, qstat is run for this job only.
 
     Object properties:
-       
+
         * jobid
         * data : the output of 'qstat -f <jobid>' consists of lines containing 'key = value'. The data property stores key-value pairs in an OrderDict.
         * node_cores : a dict with allocated compute nodes as key and a comma-separated range list identifying the allocated cores as values.
-        * node_sar : a dict for storing Data_sar objects for each node.  
+        * node_sar : a dict for storing Data_sar objects for each node.
     """
-    #---------------------------------------------------------------------------    
-    def __init__(self,jobid,offline_test__=False):
+    #---------------------------------------------------------------------------
+    def __init__(self,jobid,offline_test__=False,data=None):
         self.jobid = jobid
-        if offline_test__:
+        if data is not None:
+            self.data = data
+        elif offline_test__:
             import xmltodict
             xml_dict = xmltodict.parse( open('qstat.xml').read() )
             self.data = xml_dict['Data']['Job']
@@ -79,7 +109,21 @@ class Data_qstat:
         """
         value = self.data['exec_host']
         return value
-    #---------------------------------------------------------------------------    
+    #---------------------------------------------------------------------------
+    def nodes_for_display(self):
+        """
+        :return: the exec_host value split into its per-node parts.
+        :rtype: list of str
+
+        The split is done once and memoized - the node list does not change
+        over the lifetime of the job, but is rendered for every details text.
+        """
+        nodes = getattr(self,'_exec_host_nodes',None)
+        if nodes is None:
+            nodes = self.get_exec_host().split('+')
+            self._exec_host_nodes = nodes
+        return nodes
+    #---------------------------------------------------------------------------
     def get_username(self):
         """
         :return: username of this job's owner.
@@ -193,21 +237,18 @@ class Data_qstat:
                 self.sar_effic = mhost_data_sar.columns['%user'][1]
         else:
             # we still need to comput the all node average
-            avgs = [self.get_ncores()]
-            avgs.extend(6*[0])
-            for data_sar in self.node_sar.values():
-                if not data_sar.command_failed:
-                    avgs[1] += data_sar.columns['%user'  ][0]
-                    avgs[2] += data_sar.columns['%nice'  ][0]
-                    avgs[3] += data_sar.columns['%system'][0]
-                    avgs[4] += data_sar.columns['%iowait'][0]
-                    avgs[5] += data_sar.columns['%steal' ][0]
-                    avgs[6] += data_sar.columns['%idle'  ][0]
+            node_avgs = [ data_sar.get_cpu_averages()
+                          for data_sar in self.node_sar.values()
+                          if not data_sar.command_failed
+                        ]
             nnodes = self.get_nnodes()
-            for i in range(1,7):
-                avgs[i]/=nnodes
+            avgs = [self.get_ncores()]
+            if node_avgs:
+                avgs.extend( sum(column)/nnodes for column in zip(*node_avgs) )
+            else:
+                avgs.extend(6*[0])
             self.sar_effic = avgs[1]
-            all_node_avg = 'AVERAGE  '+Data_sar.line_fmt.format(*avgs)
+            all_node_avg = 'AVERAGE  '+Data_sar.format_line(*avgs)
             mhost_data_sar = od_first(self.node_sar)[1]
             mhost_data_sar.data_cores.insert(0,all_node_avg)
         return self.sar_effic
@@ -8,7 +8,7 @@ Classes and functions
 """
 import paramiko,subprocess    
 import xmltodict
-import shlex,sys,datetime
+import shlex,sys,datetime,tarfile
 from time import sleep
 
 import logindetails
@@ -33,7 +33,14 @@ def err_print(*args,to_stderr=True,print_time=True):
     if to_stderr:
         sys.stderr.write(s)
     return s
-#===============================================================================    
+#===============================================================================
+ssh = ( 'ssh -o ControlMaster=auto'
+            ' -o ControlPath=~/.ssh/ojm-%r@%h:%p'
+            ' -o ControlPersist=10m' )
+""" ssh invocation for per-node commands. The control options multiplex all
+invocations for the same node over one persistent master connection, so only
+the first command to a node pays the tcp + authentication setup. """
+#===============================================================================
 class Connection:
     """
     Class for managing a paramiko (ssh) connection to hopper:
@@ -54,6 +61,7 @@ class Connection:
         Open a connection
         """
         self.paramiko_client = None
+        self.sftp = None
         host = cluster_properties[cluster]['login_nodes'][login_node]
         try:
             self.paramiko_client = paramiko.client.SSHClient()
@@ -82,7 +90,17 @@ class Connection:
         :rtype: bool.
         """
         return not self.paramiko_client is None
-    #---------------------------------------------------------------------------    
+    #---------------------------------------------------------------------------
+    def open_sftp(self):
+        """
+        Return the sftp channel of this connection. The channel is opened on
+        first use and kept open: opening one costs a round-trip and the copy
+        functions are called many times per session.
+        """
+        if self.sftp is None:
+            self.sftp = self.paramiko_client.open_sftp()
+        return self.sftp
+    #---------------------------------------------------------------------------
 
 #===============================================================================    
 def connect_to_login_node(cluster=current_cluster,login_node=0):
@@ -401,9 +419,8 @@ def copy_local_to_remote(local_source,remote_destination):
     :param str local_source: path to the local file.
     :param str remote_destination: path to remote file (filename must be included). 
     """
-    sftp = Connection.the_connection.paramiko_client.open_sftp()
+    sftp = Connection.the_connection.open_sftp()
     sftp.put(local_source, remote_destination)
-    sftp.close()
 #===============================================================================
 def copy_remote_to_local(local_destination,remote_source,rename=False):
     """
@@ -418,9 +435,8 @@ def copy_remote_to_local(local_destination,remote_source,rename=False):
     *rename* may have the same filename but a different directory path, in wich case the 
     source is effectively to a different directory. 
     """
-    sftp = Connection.the_connection.paramiko_client.open_sftp()
+    sftp = Connection.the_connection.open_sftp()
     sftp.get(remote_source,local_destination)
-    sftp.close()
     if isinstance(rename,str):
         if rename:
             command = 'mv {} {}'.format(remote_source,rename)
@@ -432,6 +448,24 @@ def copy_remote_to_local(local_destination,remote_source,rename=False):
         if not (isinstance(rename,bool) and rename==False):
             raise ValueError("kwarg 'rename' must be str or False, got {}.".format(rename))
 #===============================================================================
+def bulk_copy_remote_to_local(remote_dir,local_dir,pattern):
+    """
+    Copy all files matching *pattern* in remote directory *remote_dir* to local
+    directory *local_dir*.
+
+    :param str remote_dir: path to the remote directory containing the files.
+    :param str local_dir: path to the local destination directory.
+    :param str pattern: filename pattern to be matched, accepts linux wild cards.
+
+    The files are streamed as a single compressed tar archive over the existing
+    ssh connection, so the cost is one remote command instead of one sftp
+    round-trip per file.
+    """
+    command = 'cd {} && tar czf - {}'.format(remote_dir,pattern)
+    tpl = Connection.the_connection.paramiko_client.exec_command(command)
+    with tarfile.open(fileobj=tpl[1],mode='r|gz') as archive:
+        archive.extractall(local_dir)
+#===============================================================================
 
 #===============================================================================
 # test code below
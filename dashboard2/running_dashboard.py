@@ -105,7 +105,7 @@ class RunningDashboard(QtGui.QMainWindow):
         Build and show the text in the job overview pane for the sample corresponding to *timestamp*. 
         """
         self.ui.qwOverviewTimestamp.setText(timestamp)
-        text = self.sampler.overviews[timestamp] 
+        text = self.sampler.overview_text(timestamp)
         self.ui.qwOverview.setPlainText( text )
         i = 1+self.sampler.timestamps.index(timestamp)
         n = self.sampler.nsamples()
@@ -130,7 +130,7 @@ class RunningDashboard(QtGui.QMainWindow):
             job.address = address_of(job.username)
             details = job.address+job.get_details(timestamp)
             self.ui.qwDetails.setPlainText(details)
-            timestamps = job.timestamps()
+            timestamps = list(job.timestamps())
             n = len(timestamps)
             i = 1+timestamps.index(timestamp)
             text = '{} / {} '.format(i,n)
@@ -150,49 +150,44 @@ class RunningDashboard(QtGui.QMainWindow):
 #             print('ignored')
             return
 
-        cursor = self.ui.qwOverview.textCursor()
+        # The line search is done on the python side; the cursor then jumps at most
+        # once, with an O(1) findBlockByNumber lookup, instead of stepping through the
+        # document line by line with movePosition.
+        document = self.ui.qwOverview.document()
+        current_block = self.ui.qwOverview.textCursor().blockNumber()
+        lines = self.ui.qwOverview.toPlainText().split('\n')
         if self.previous_jobid:
-            previous_block = cursor.blockNumber()
+            block = current_block
+            while block < len(lines) and not lines[block].startswith(self.previous_jobid):
+                block += 1
+            if block == len(lines): # we've reached the end without finding the jobid
+                block = current_block
+            cursor = QtGui.QTextCursor(document.findBlockByNumber(block))
             cursor.select(QtGui.QTextCursor.LineUnderCursor)
-            selection = cursor.selectedText()
-            while not selection.startswith(self.previous_jobid):
-                cursor.movePosition(QtGui.QTextCursor.Down)
-                current_block = cursor.blockNumber()
-                if previous_block==current_block:
-                    break # we've reached the end
-                previous_block = current_block
-                cursor.select(QtGui.QTextCursor.LineUnderCursor)
-                selection = cursor.selectedText()
             with IgnoreSignals(self):
                 self.ui.qwOverview.setTextCursor(cursor)
-            current_block = cursor.blockNumber()
-            self.previous_block = current_block
+            self.previous_block = block
             self.previous_jobid = ''
-        else:    
-            current_block = cursor.blockNumber()
-            if self.previous_block < current_block: 
-                move_op = QtGui.QTextCursor.Down
-            elif self.previous_block > current_block:
-                move_op = QtGui.QTextCursor.Up
+        else:
+            step = 1 if self.previous_block < current_block else -1
+            block = current_block
+            while 0 <= block < len(lines) and lines[block].startswith(' '):
+                block += step
+            if not 0 <= block < len(lines):
+                block = current_block
+            cursor = QtGui.QTextCursor(document.findBlockByNumber(block))
             cursor.select(QtGui.QTextCursor.LineUnderCursor)
             selection = cursor.selectedText()
-            while selection.startswith(' '):
-                cursor.movePosition(move_op)
-                current_block = cursor.blockNumber()
-                cursor.select(QtGui.QTextCursor.LineUnderCursor)
-                s = cursor.selectedText()
-                if s==selection: # break out of endless loop when moving the cursor downwards on the last line 
-                    break; 
-                selection = s
             with IgnoreSignals(self):
                 self.ui.qwOverview.setTextCursor(cursor)
-            self.previous_block = current_block
+            self.previous_block = block
             jobid = selection.split(' ',1)[0]
             if jobid=='Jobs':
-                jobid = ''        
+                jobid = ''
             timestamp = self.qwOverviewTimestamp.text()
             self.show_details(jobid,timestamp)
-            print('selected:',jobid)
+            if self.verbose:
+                print('selected:',jobid)
     #---------------------------------------------------------------------------------------------------------
     def on_qwOverviewFirst_pressed(self):
         """
@@ -233,7 +228,7 @@ class RunningDashboard(QtGui.QMainWindow):
         """
         Show the overview corresponding to the last sample.
         """
-        print('on_qwOverviewLast_pressed')
+#         print('on_qwOverviewLast_pressed')
         self.move_overview(index=-1)
     #---------------------------------------------------------------------------------------------------------
     def move_overview(self,index=None,delta=None):
@@ -280,7 +275,7 @@ class RunningDashboard(QtGui.QMainWindow):
         """
         Show the details of the selected job corresponding to 1 sample ahead.
         """
-        print('on_qwDetailsFwd_pressed')
+#         print('on_qwDetailsFwd_pressed')
         self.move_details(delta=1)
     #---------------------------------------------------------------------------------------------------------         
     def on_qwDetailsFFwd_pressed(self):
@@ -307,7 +302,7 @@ class RunningDashboard(QtGui.QMainWindow):
         i = index
         jobid = self.ui.qwDetailsJobid.text()
         job = self.sampler.jobs[jobid]
-        timestamps = job.timestamps()
+        timestamps = list(job.timestamps())
         n = len(timestamps)
         if delta:
             timestamp = self.ui.qwDetailsTimestamp.text()
@@ -324,8 +319,9 @@ class RunningDashboard(QtGui.QMainWindow):
         """
         Copy the email address of the user of the current job to the clipboard.
         """
-        address = address_of(self.username) 
-        print(address)
+        address = address_of(self.username)
+        if self.verbose:
+            print(address)
         clipboard = QtGui.qApp.clipboard()
         clipboard.setText(address)
     #---------------------------------------------------------------------------------------------------------
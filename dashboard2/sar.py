@@ -27,7 +27,7 @@ def run_sar_P(compute_node,cores=None):
     :param list cores: a list of core ids for which the information is neede. 
     :returns: list with the relevant output lines
     """
-    command = "ssh {} sar -P ALL 1 1".format(compute_node)
+    command = "{} {} sar -P ALL 1 1".format(remote.ssh,compute_node)
     lines = remote.run(command,attempts=2,post_processor=remote.list_of_lines)
     if lines is None:
         lines = ['command failed: '+command]
@@ -67,7 +67,10 @@ class Data_sar:
     :param list cores: a list of core ids.
     """
     line_fmt = '{:3}{:10.2f}{:10.2f}{:10.2f}{:10.2f}{:10.2f}{:10.2f}'
-    """ Format string for formatting row data in the same way as the ``sar`` output. """ 
+    """ Format string for formatting row data in the same way as the ``sar`` output. """
+    format_line = line_fmt.format
+    """ The formatter of *line_fmt*, bound once at class definition so the
+    per-line rendering loops skip the attribute lookups. """
     #---------------------------------------------------------------------------    
     def __init__(self,compute_node,cores=None):
         self.compute_node = compute_node
@@ -109,8 +112,18 @@ class Data_sar:
             else:
                 avg = sum(column)/len(column)
                 column.insert(0,avg)
+        # keep the six core-averaged cpu metrics together as a tuple, so that
+        # callers averaging over nodes can reduce with zip/sum instead of six
+        # dict lookups per node.
+        self.cpu_averages = ( self.columns['%user'  ][0]
+                            , self.columns['%nice'  ][0]
+                            , self.columns['%system'][0]
+                            , self.columns['%iowait'][0]
+                            , self.columns['%steal' ][0]
+                            , self.columns['%idle'  ][0]
+                            )
         # format the averages in a text line and add it after the header line
-        avg_line = Data_sar.line_fmt.format(self.columns['CPU'    ][0]
+        avg_line = Data_sar.format_line(self.columns['CPU'    ][0]
                                            ,self.columns['%user'  ][0]
                                            ,self.columns['%nice'  ][0]
                                            ,self.columns['%system'][0]
@@ -119,7 +132,26 @@ class Data_sar:
                                            ,self.columns['%idle'  ][0]
                                            )
         self.data_cores.insert(1,avg_line)
-    #---------------------------------------------------------------------------    
+    #---------------------------------------------------------------------------
+    def get_cpu_averages(self):
+        """
+        :return: the six core-averaged cpu metrics as a tuple.
+
+        Objects unpickled from reports written before *cpu_averages* existed
+        only have *columns* - build (and keep) the tuple from those.
+        """
+        try:
+            return self.cpu_averages
+        except AttributeError:
+            self.cpu_averages = ( self.columns['%user'  ][0]
+                                , self.columns['%nice'  ][0]
+                                , self.columns['%system'][0]
+                                , self.columns['%iowait'][0]
+                                , self.columns['%steal' ][0]
+                                , self.columns['%idle'  ][0]
+                                )
+            return self.cpu_averages
+    #---------------------------------------------------------------------------
     def get(self,column_header,core_id):
         """        
         :param str column_header: header of the column.
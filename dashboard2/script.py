@@ -18,7 +18,7 @@ class Data_jobscript:
         self.jobid = jobid
         self.modules = None                    
         try:
-            command = "ssh {} 'sudo cat /opt/moab/spool/torque/mom_priv/jobs/{}.hopper.SC'".format(compute_node,jobid)
+            command = "{} {} 'sudo cat /opt/moab/spool/torque/mom_priv/jobs/{}.hopper.SC'".format(remote.ssh,compute_node,jobid)
             self.data = remote.run(command,post_processor=remote.list_of_lines,attempts=1,raise_exception=True)            
         except Exception as e:
             print(type(e),e)
@@ -5,15 +5,17 @@ Functions and classes for sampling the *showq* output.
 import remote
 from script     import Data_jobscript
 from cfg        import Cfg
-from qstatx     import Data_qstat
+from qstatx     import Data_qstat,run_qstat_f_all
 from sar        import Data_sar
 from titleline  import title_line
 import          rules
-from mycollections import OrderedDict,od_add_list_item,od_last
+from collections import defaultdict
 from cluster    import current_cluster,cluster_properties
 
-import pickle,os,shutil,gzip
-from time       import sleep
+import pickle,os,shutil,gzip,mmap
+import functools,weakref,threading
+from concurrent.futures import ThreadPoolExecutor,as_completed
+from time       import sleep,time,monotonic
 import datetime
 
 # list of users we want to ignore for the time being...
@@ -58,9 +60,12 @@ def run_showq():
     return data_showq 
 
 #===============================================================================    
+_warned_get_effic = False
+""" One-shot flag for the deprecation warning in :func:`ShowqJobEntry.get_effic`. """
+#===============================================================================
 class ShowqJobEntry:
     """
-    Class for storing and manipulating a single job entry in the xml output of showq. 
+    Class for storing and manipulating a single job entry in the xml output of showq.
     
     Here is a typical job entry (in xml). It is converted to an :class:`OrderdDict`
     by :func:`xmltodict.parse`:
@@ -91,36 +96,59 @@ class ShowqJobEntry:
        SuspendDuration="0"
        User="vsc20213"
        >
-       </job>    
+       </job>
     """
-    #---------------------------------------------------------------------------    
+    __slots__ = ('jobid','jobid_long','state','username','mhost','mhost_short','ncores','ps_ded','ps_utl','effic_raw')
+    #---------------------------------------------------------------------------
     def __init__(self,job_entry):
-        self.data = job_entry # OrderedDict
-    #---------------------------------------------------------------------------    
+        # promote the fields the getters need to plain attributes, so that the
+        # getters do not pay a dict lookup (and an int()/float() conversion)
+        # on every call in the sampling loops.
+        self.jobid       = job_entry['@JobID']
+        self.jobid_long  = job_entry['@DRMJID']
+        self.state       = job_entry['@State']
+        self.username    = job_entry['@User']
+        self.mhost       = job_entry['@MasterHost']
+        self.mhost_short = self.mhost.split('.',1)[0]
+        self.ncores      = int  ( job_entry['@ReqProcs'  ] )
+        self.ps_ded      = float( job_entry['@StatPSDed' ] )
+        self.ps_utl      = float( job_entry['@StatPSUtl' ] )
+        self.effic_raw   = (100.0*self.ps_utl/self.ps_ded) if self.ps_ded else 100.0 # [%]
+    #---------------------------------------------------------------------------
+    def __setstate__(self,state):
+        # report files pickled before __slots__ store the state as a plain dict,
+        # the oldest ones as the raw showq OrderedDict.
+        if isinstance(state,tuple):
+            state = state[1]
+        if 'data' in state:
+            self.__init__(state['data'])
+        else:
+            for key,value in state.items():
+                setattr(self,key,value)
+            if 'effic_raw' not in state:
+                self.effic_raw = (100.0*self.ps_utl/self.ps_ded) if self.ps_ded else 100.0
+    #---------------------------------------------------------------------------
     def get_jobid_long(self):
-        """ 
+        """
         :return: long jobid, includes the cluster on which it was submitted.
-        :rtype: str 
+        :rtype: str
         """
-        jobid = self.data['@DRMJID']
-        return jobid
-    #---------------------------------------------------------------------------    
+        return self.jobid_long
+    #---------------------------------------------------------------------------
     def get_jobid(self):
-        """ 
+        """
         :return: short jobid, just the number.
-        :rtype: str 
+        :rtype: str
         """
-        jobid = self.data['@JobID']
-        return jobid
-    #---------------------------------------------------------------------------    
+        return self.jobid
+    #---------------------------------------------------------------------------
     def get_state(self):
         """
         :return: state of the job, 'R', 'C', ...
-        :rtype: str, 1 character. 
+        :rtype: str, 1 character.
         """
-        state = self.data['@State']
-        return state
-    #---------------------------------------------------------------------------    
+        return self.state
+    #---------------------------------------------------------------------------
     def get_effic(self,ncores_used_on_mhost=0):
         """
         Return the efficiciency, corrected or uncorrected (*ncores_used_on_mhost*>0).
@@ -158,46 +186,42 @@ class ShowqJobEntry:
         rather than on the entire job! It is our hope that if the master node is performing 
         well, the slave nodes do so too.        
         """
-        remote.err_print('method showq.ShowqJobEntry.get_effic(self, ncores_used_on_mhost) may '
-                         'report incorrect values. Use JobSample.get_effic() instead.'
-                        , print_time=False
-                        ) 
-        numerator   = self.data['@StatPSUtl']
-        denominator = self.data['@StatPSDed']
-        try:
-            value = 100*float(numerator)/float(denominator) # [%]
-        except ZeroDivisionError:
-            value = 100 # seems safe
+        global _warned_get_effic
+        if not _warned_get_effic:
+            # warn only once - this method sits on the per-job per-sample path.
+            _warned_get_effic = True
+            remote.err_print('method showq.ShowqJobEntry.get_effic(self, ncores_used_on_mhost) may '
+                             'report incorrect values. Use JobSample.get_effic() instead.'
+                            , print_time=False
+                            )
+        value = self.effic_raw
         if ncores_used_on_mhost>0 and Cfg.correct_effic:
             # scale the effic value to the master host node only, i.e. "correct" it.
-            value *= self.get_ncores()/ncores_used_on_mhost 
+            value *= self.ncores/ncores_used_on_mhost
         return round(value,2)
-    #---------------------------------------------------------------------------    
+    #---------------------------------------------------------------------------
     def get_username(self):
         """
-        :return: username of the user that started this job. 
+        :return: username of the user that started this job.
         """
-#         :return str: username. 
-        value = self.data['@User']
-        return value
-    #---------------------------------------------------------------------------    
+#         :return str: username.
+        return self.username
+    #---------------------------------------------------------------------------
     def get_mhost(self,short=True):
-        """ 
+        """
         :return: the mhost node (node on wcich the job started.
         """
-#         :return str: name of the master compute node. 
-        value = self.data['@MasterHost']
+#         :return str: name of the master compute node.
         if short:
-            value = value.split('.',1)[0]
-        return value    
-    #---------------------------------------------------------------------------    
+            return self.mhost_short
+        return self.mhost
+    #---------------------------------------------------------------------------
     def get_ncores(self):
-        """ 
-        :return int: total number of cores for this job . 
         """
-        value = int( self.data['@ReqProcs'] )
-        return value
-    #---------------------------------------------------------------------------    
+        :return int: total number of cores for this job .
+        """
+        return self.ncores
+    #---------------------------------------------------------------------------
 
 #===============================================================================    
 def overview_by_user(arg):
@@ -207,16 +231,29 @@ def overview_by_user(arg):
     return arg.split(' ',1)[1]
     #---------------------------------------------------------------------------    
 
+#===============================================================================
+script_section_marker = title_line('Script',width=100,char='-')
+""" Title line that opens the job script section in the details text. """
+#===============================================================================
+timestamp_format = '%Y.%m.%d.%Hh%M'
 #===============================================================================   
-timestamp_format = '%Y.%m.%d.%Hh%M' 
-#===============================================================================   
+_timestamp_cache = [0,'']
+""" [minute,timestamp] pair of the last :func:`get_timestamp_now` call. """
+#===============================================================================
 def get_timestamp_now():
     """
     :return: a timestamp based on the current time.
     :rtype: str
+
+    The timestamp has minute resolution; calls within the same minute return
+    the cached string without paying for strftime again.
     """
-    timestamp = datetime.datetime.now().strftime(timestamp_format)
-    return timestamp
+    now = time()
+    minute = int(now//60)
+    if minute != _timestamp_cache[0]:
+        _timestamp_cache[0] = minute
+        _timestamp_cache[1] = datetime.datetime.fromtimestamp(now).strftime(timestamp_format)
+    return _timestamp_cache[1]
     #---------------------------------------------------------------------------    
 
 #===============================================================================
@@ -225,34 +262,67 @@ class JobSample:
     :param ShowqJobEntry job_entry: the job entry.
     :param Job job: the parent :class: Job object.
     :param str timestamp: the timestamp of the sample.
+    :param Data_qstat qstat_data: prefetched qstat data (see :func:`Sampler.refresh_qstat`). If *None*, the sampler's qstat cache is consulted, and only as a last resort qstat is run for this job alone.
     """
-    #---------------------------------------------------------------------------    
-    def __init__(self,job_entry,job,timestamp):
+    __slots__ = ( 'showq_job_entry','parent_job','timestamp','data_qstat'
+                , 'mhost_job_info','data_sar','effic','details','warnings','overview' )
+    #---------------------------------------------------------------------------
+    def __init__(self,job_entry,job,timestamp,qstat_data=None):
         assert isinstance(job_entry, ShowqJobEntry)
         assert isinstance(job, Job)
         self.showq_job_entry = job_entry
-        self.parent_job      = job
+        # a weak proxy: the parent Job owns its samples, the upward reference
+        # must not keep the cycle alive nor end up in the pickle stream.
+        self.parent_job      = weakref.proxy(job)
         self.timestamp       = timestamp
-        self.data_qstat      = Data_qstat( job.jobid )
+        if qstat_data is None and job.sampler is not None:
+            qstat_data = job.sampler.qstat_cache.get(job.jobid)
+        if qstat_data is None:
+            qstat_data = Data_qstat( job.jobid )
+        self.data_qstat      = qstat_data
         self.mhost_job_info  = None# NeighbouringJobInfo(self)
         self.data_sar        = None
-        self.details = ''       
+        self.effic           = None # computed on first get_effic() call
+        self.details = ''
+    #---------------------------------------------------------------------------
+    def __getstate__(self):
+        # parent_job is a weakref proxy and cannot be pickled - drop it here,
+        # unpickle() reassigns it after loading.
+        state = { slot:getattr(self,slot) for slot in self.__slots__ if hasattr(self,slot) }
+        state['parent_job'] = None
+        return state
+    #---------------------------------------------------------------------------
+    def __setstate__(self,state):
+        # report files pickled before __slots__ store the state as a plain dict.
+        if isinstance(state,tuple):
+            state = state[1]
+        for key,value in state.items():
+            try:
+                setattr(self,key,value)
+            except AttributeError:
+                pass # attribute from an older version that no longer exists
     #---------------------------------------------------------------------------
     def check_for_issues(self):
         """
         :return: True (False) if there are (aren't) issues (all rules satisfied) for this JobSample 
         """
-        self.mhost_job_info  = NeighbouringJobInfo(self)
         self.warnings = []
         self.overview = ''
         self.details  = ''
-        if not self.data_qstat.is_interactive_job(): #interactive jobs are ignored
-            for irule,rule in enumerate(rules.the_rules):
-                msg = rule.check(self)
-                if msg:
-                    self.warnings.append(msg)
-                    self.parent_job.warning_counts[irule] += 1
-        
+        # whether a job is interactive never changes - test it on the first
+        # sample only and remember the answer on the parent Job.
+        if self.parent_job.interactive is None:
+            self.parent_job.interactive = self.data_qstat.is_interactive_job()
+        if self.parent_job.interactive: #interactive jobs are ignored
+            return False
+        # only now gather the neighbour info - interactive jobs never need it.
+        self.mhost_job_info  = NeighbouringJobInfo(self)
+        for irule,rule in enumerate(rules.the_rules):
+            msg = rule.check(self)
+            if msg:
+                self.warnings.append(msg)
+                self.parent_job.warning_counts[irule] += 1
+
         if self.warnings:
             self.parent_job.nsamples_with_warnings += 1
             return True
@@ -290,58 +360,59 @@ class JobSample:
         if self.details or not self.warnings:
             return self.details
 
-        self.details = str(self.overview) # make a copy
-        self.details += '\n\n#samples with warnings : {} / {} = {}%'.format( self.parent_job.nsamples_with_warnings
-                                                                           , self.parent_job.nsamples()
-                                                                           , round(100*self.parent_job.nsamples_with_warnings/self.parent_job.nsamples(),2)
-                                                                           )
+        # build the details as a list of parts and join once - repeated str +=
+        # reallocates the whole buffer on every append.
+        parts = [ str(self.overview) ]
+        parts.append('\n\n#samples with warnings : {} / {} = {}%'.format( self.parent_job.nsamples_with_warnings
+                                                                        , self.parent_job.nsamples()
+                                                                        , round(100*self.parent_job.nsamples_with_warnings/self.parent_job.nsamples(),2)
+                                                                        )
+                    )
         for irule,count in enumerate(self.parent_job.warning_counts):
             rule = rules.the_rules[irule]
             if count>0:
-                self.details +='\n  {:25}: {:5}'.format(rule.warning,count)
+                parts.append('\n  {:25}: {:5}'.format(rule.warning,count))
 
-        self.details += '\nwalltime used/remaining: {} / {}'.format( self.data_qstat.get_walltime_used()
-                                                                   , self.data_qstat.get_walltime_remaining()
-                                                                   )
+        parts.append('\nwalltime used/remaining: {} / {}'.format( self.data_qstat.get_walltime_used()
+                                                                , self.data_qstat.get_walltime_remaining()
+                                                                )
+                    )
         mem_available = cluster_properties[current_cluster]['mem_avail_gb'](self.get_nodes())
-        self.details += '\nmem [GB] used/requested/available: {} / {} / {}'.format( round(self.data_qstat.get_mem_used()     ,3)
-                                                                                  , round(self.data_qstat.get_mem_requested(),3) 
-                                                                                  , mem_available 
-                                                                                  )
+        parts.append('\nmem [GB] used/requested/available: {} / {} / {}'.format( round(self.data_qstat.get_mem_used()     ,3)
+                                                                               , round(self.data_qstat.get_mem_requested(),3)
+                                                                               , mem_available
+                                                                               )
+                    )
         hdr = 'nodes and cores used: '
         nohdr = len(hdr)*' '
-        nodes = self.data_qstat.get_exec_host().split('+')
-        self.details += '\n'+hdr+nodes[0]
-        for node in nodes[1:]:
-            self.details += '\n'+nohdr+node
-            
-        self.details += self.mhost_job_info.to_str() 
-            
+        nodes = self.data_qstat.nodes_for_display()
+        parts.append('\n'+hdr+('\n'+nohdr).join(nodes))
+
+        parts.append(self.mhost_job_info.to_str())
+
         if self.data_qstat.node_sar:
-            self.details += title_line('sar -P ALL 1 1',width=100,char='-')
+            parts.append(title_line('sar -P ALL 1 1',width=100,char='-'))
             if len(self.data_qstat.node_sar)>1:
-                avgs = [self.get_ncores()]
-                avgs.extend(6*[0])
-                for data_sar in self.data_qstat.node_sar.values():
-                    if hasattr(data_sar,'columns'):
-                        avgs[1] += data_sar.columns['%user'  ][0]
-                        avgs[2] += data_sar.columns['%nice'  ][0]
-                        avgs[3] += data_sar.columns['%system'][0]
-                        avgs[4] += data_sar.columns['%iowait'][0]
-                        avgs[5] += data_sar.columns['%steal' ][0]
-                        avgs[6] += data_sar.columns['%idle'  ][0]
+                node_avgs = [ data_sar.get_cpu_averages()
+                              for data_sar in self.data_qstat.node_sar.values()
+                              if not data_sar.command_failed
+                            ]
                 nnodes = self.get_nnodes()
-                for i in range(1,7):
-                    avgs[i]/=nnodes
-                self.details += 'AVERAGE  '+Data_sar.line_fmt.format(*avgs)+'\n'
+                avgs = [self.get_ncores()]
+                if node_avgs:
+                    avgs.extend( sum(column)/nnodes for column in zip(*node_avgs) )
+                else:
+                    avgs.extend(6*[0])
+                parts.append('AVERAGE  '+Data_sar.format_line(*avgs)+'\n')
             for node, data_sar in self.data_qstat.node_sar.items():
                 for line in data_sar.data_cores:
-                    self.details += node+' '+line +'\n'
-        self.details += title_line('Script',width=100,char='-') 
+                    parts.append(node+' '+line+'\n')
+        parts.append(script_section_marker)
         for line in self.parent_job.jobscript.clean:
-            self.details += line+'\n'
-        self.details += title_line(width=100,char='-')
-            
+            parts.append(line+'\n')
+        parts.append(title_line(width=100,char='-'))
+
+        self.details = ''.join(parts)
         return self.details
     #---------------------------------------------------------------------------        
     def walltime(self,hours=False):
@@ -391,11 +462,12 @@ class JobSample:
                   generated if the mhost is below the threshold). 
                   See allso :func:`ShowqJobEntry.get_effic()`.
         """
-        if not hasattr(self,'effic'):
+        if getattr(self,'effic',None) is None:
             # we must first compute it.
             try:
-                walltime                   = hhmmss2s( self.data_qstat.data['resources_used']['walltime'] )
-                cputime_used_by_all_cores  = hhmmss2s( self.data_qstat.data['resources_used']['cput'] )
+                resources_used             = self.data_qstat.data['resources_used']
+                walltime                   = hhmmss2s( resources_used['walltime'] )
+                cputime_used_by_all_cores  = hhmmss2s( resources_used['cput'] )
                 ncores   = self.get_ncores()
                 self.effic = 100*cputime_used_by_all_cores/(ncores*walltime)
                 if mhost_only:
@@ -470,10 +542,22 @@ class JobSample:
 #===============================================================================
 class NeighbouringJobInfo:
     """
-    Info on all jobs running on the master node of a job sample.  
-    
+    Info on all jobs running on the master node of a job sample.
+
     :param JobSample job_sample:
     """
+    __slots__ = ('jobid','nnodes','ncores','effic','memory','mhost','n')
+    #---------------------------------------------------------------------------
+    def __setstate__(self,state):
+        # report files pickled before __slots__ store the state as a plain dict.
+        if isinstance(state,tuple):
+            state = state[1]
+        for key,value in state.items():
+            try:
+                setattr(self,key,value)
+            except AttributeError:
+                pass
+    #---------------------------------------------------------------------------
     def __init__(self,job_sample):
         timestamp = job_sample.timestamp
         jobid1 = job_sample.get_jobid()
@@ -482,82 +566,99 @@ class NeighbouringJobInfo:
         self.ncores = [job_sample.get_ncores()]
         self.effic  = [job_sample.get_effic ()]
         self.memory = [job_sample.get_mem   ()]
-        
+
         self.mhost = job_sample.get_mhost(short=True)
-        neighbouring_jobs = job_sample.parent_job.sampler.mhost_jobs[self.mhost]
-        
+        sampler = job_sample.parent_job.sampler
+        neighbouring_jobs = sampler.mhost_jobs[self.mhost]
+        # the sampler computes the metrics of all jobs on this mhost once per
+        # timestamp - every job on the host needs those of all its neighbours.
+        metrics = sampler.neighbour_metrics(self.mhost,timestamp)
+
         for jobid2 in neighbouring_jobs:
             if jobid2 != jobid1:
-                job2 = job_sample.parent_job.sampler.jobs[jobid2]
-                try:
-                    job2sample = job2.get_sample(timestamp)
-                except KeyError as e:
-                    print(type(e),e,job2)
+                job2metrics = metrics.get(jobid2)
+                if job2metrics is None:
                     self.nnodes.append(0)
                     self.ncores.append(0)
                     self.effic .append(0)
                     self.memory.append(0)
                 else:
-                    self.nnodes.append(job2sample.get_nnodes())
-                    self.ncores.append(job2sample.get_ncores())
-                    self.effic .append(job2sample.get_effic ())
-                    self.memory.append(job2sample.get_mem   ())
+                    self.nnodes.append(job2metrics[0])
+                    self.ncores.append(job2metrics[1])
+                    self.effic .append(job2metrics[2])
+                    self.memory.append(job2metrics[3])
                 self.jobid .append(jobid2)
         self.n = len(neighbouring_jobs)
         if self.n>1:
             self.jobid .append('total:')
             self.nnodes.append(1)
-            self.ncores.append(sum(self.ncores))
-            effic = 0
-            for i in range(self.n):                
-                effic += self.effic[i]*self.ncores[i]
-            self.effic.append( effic/self.ncores[-1] )
+            ncores_total = sum(self.ncores)
+            # core-weighted average efficiency, reduced by sum/zip instead of
+            # an index loop
+            effic = sum( e*c for e,c in zip(self.effic,self.ncores) )
+            self.ncores.append(ncores_total)
+            self.effic .append(effic/ncores_total)
             self.memory.append(sum(self.memory))
     #---------------------------------------------------------------------------        
     def to_str(self):
         """
         Format self as a *str*.
         """
-        s = '\nother jobs on {}: '.format(self.mhost)
+        parts = ['\nother jobs on {}: '.format(self.mhost)]
         if self.n == 1:
-            s += 'None.'
+            parts.append('None.')
         else:
             fmt = '\n  **{}**{:3}|{:2} {:5.1f}% {:7.3f}GB'
-            i = 0 
-            s+= '{} (total={}).'.format(self.n-1,self.n) 
-            s+= fmt.format( self.jobid [i]
-                          , self.nnodes[i]
-                          , self.ncores[i]
-                          , self.effic [i]
-                          , self.memory[i]
-                          )
+            i = 0
+            parts.append('{} (total={}).'.format(self.n-1,self.n))
+            parts.append( fmt.format( self.jobid [i]
+                                    , self.nnodes[i]
+                                    , self.ncores[i]
+                                    , self.effic [i]
+                                    , self.memory[i]
+                                    )
+                        )
             fmt = fmt.replace('*',' ')
             for i in range(1,self.n):
                 if self.nnodes[i]!=0:
-                    s += fmt.format( self.jobid [i]
-                                   , self.nnodes[i]
-                                   , self.ncores[i]
-                                   , self.effic [i]
-                                   , self.memory[i]
-                                   )
+                    parts.append( fmt.format( self.jobid [i]
+                                            , self.nnodes[i]
+                                            , self.ncores[i]
+                                            , self.effic [i]
+                                            , self.memory[i]
+                                            )
+                                )
                 else:
-                    s+= '\n    {} (no info)'.format(self.jobid[i])
-        s+='\n'
-        return s
+                    parts.append('\n    {} (no info)'.format(self.jobid[i]))
+        parts.append('\n')
+        return ''.join(parts)
     #---------------------------------------------------------------------------        
         
 #===============================================================================
+@functools.lru_cache(maxsize=4096)
 def hhmmss2s(hhmmss):
     """
     Convert time duration in format HH:MM:SS to number of seconds.
-    
+
     :return: duration in seconds
     :rtype: int
+
+    The conversion is memoized: the same walltime and cput strings are parsed
+    over and over by :func:`JobSample.walltime`, :func:`JobSample.nodedays`
+    and :func:`JobSample.get_effic`.
     """
+    if len(hhmmss)==8 and hhmmss[2]==':':
+        # the common 'HH:MM:SS' case: direct digit arithmetic, no split() and
+        # no int() construction.
+        return ( ((ord(hhmmss[0])-48)*10 + ord(hhmmss[1])-48)*3600
+               + ((ord(hhmmss[3])-48)*10 + ord(hhmmss[4])-48)*60
+               +  (ord(hhmmss[6])-48)*10 + ord(hhmmss[7])-48
+               )
+    # e.g. 'HHH:MM:SS' for walltimes of 100 hours and more
     words = hhmmss.split(':')
     assert len(words)==3
     seconds = int(words[2]) + 60*( int(words[1]) + 60*int(words[0]) )
-    return seconds 
+    return seconds
 #-------------------------------------------------------------------------------
         
 #===============================================================================
@@ -572,9 +673,14 @@ class Job:
 
     Occasionally, we need to examine other jobs to judge performance of a job, e.g. 
     when a job is not using all resources of the node. For this reason :class:`Job` 
-    objects store a reference to the :class:`Sampler` object.  
+    objects store a reference to the :class:`Sampler` object.
     """
-    #---------------------------------------------------------------------------    
+    # '__weakref__' is needed because the samples hold weak proxies to their Job.
+    __slots__ = ( 'jobid','username','mhost','address','sampler'
+                , 'nsamples_with_warnings','warning_counts','interactive'
+                , 'samples','first_timestamp','last_timestamp','jobscript'
+                , '__weakref__' )
+    #---------------------------------------------------------------------------
     def __init__(self,timestamp,job_entry,sampler):
         assert isinstance(job_entry,ShowqJobEntry)
         self.jobid    = job_entry.get_jobid()
@@ -586,8 +692,9 @@ class Job:
         
         self.nsamples_with_warnings = 0
         self.warning_counts = len(rules.the_rules)*[0]
+        self.interactive = None # determined on the first sample
             
-        self.samples = OrderedDict() #{timestamp:JobSamnple object}
+        self.samples = {} #{timestamp:JobSamnple object}, insertion (=timestamp) order
         self.first_timestamp = timestamp
         self.last_timestamp  = None
         self.jobscript       = None
@@ -600,7 +707,27 @@ class Job:
         s+= self.mhost    + '\n'
         s+= str(self.samples)
         return s
-    #---------------------------------------------------------------------------    
+    #---------------------------------------------------------------------------
+    def __getstate__(self):
+        # the sampler is process state, not job data - drop it from the pickle,
+        # unpickle() reassigns it after loading.
+        state = { slot:getattr(self,slot) for slot in self.__slots__
+                  if slot!='__weakref__' and hasattr(self,slot) }
+        state['sampler'] = None
+        return state
+    #---------------------------------------------------------------------------
+    def __setstate__(self,state):
+        # report files pickled before __slots__ store the state as a plain dict.
+        if isinstance(state,tuple):
+            state = state[1]
+        for key,value in state.items():
+            try:
+                setattr(self,key,value)
+            except AttributeError:
+                pass # attribute from an older version that no longer exists
+        if 'interactive' not in state:
+            self.interactive = None
+    #---------------------------------------------------------------------------
     def add_sample(self,job_entry,timestamp):
         """
         Create a sample with the current *timestamp* from *job_entry*, and add it to the current Job.
@@ -610,10 +737,10 @@ class Job:
     #---------------------------------------------------------------------------
     def timestamps(self):
         """
-        :return: an ordered list of timestamps in this Job.
+        :return: a view of the timestamps in this Job, in sample order. Callers
+                 that need indexing must wrap it in *list()* themselves.
         """
-        keys = list(self.samples.keys())
-        return keys
+        return self.samples.keys()
     #---------------------------------------------------------------------------
 #     def index(self,timestamp):
 #         """
@@ -658,10 +785,22 @@ class Job:
         :return the details text for *timestamp*.
         """
         if not timestamp in self.samples:
-            timestamp = self.timestamps()[-1]
+            timestamp = self.last_timestamp
         details = self.samples[timestamp].compose_details()
         return details
     #---------------------------------------------------------------------------
+    def get_details_parts(self,timestamp):
+        """
+        :return: the details text for *timestamp*, split as *(head,script_section)*.
+
+        The split is a single :func:`str.partition` on the script title line. If the
+        details contain no script section, *script_section* is the empty string and
+        *head* is the complete details text.
+        """
+        details = self.get_details(timestamp)
+        head,marker,script = details.partition(script_section_marker)
+        return (head,marker+script)
+    #---------------------------------------------------------------------------
     def remove_file(self):
         """
         Remove the *.pickled.gz* file corresponding to this Job.
@@ -677,7 +816,7 @@ class Job:
         Return the sample corresponding to *timestamp*, or, if it is *None*, the last sample.
         """
         if timestamp=='last':
-            sample = od_last(self.samples)[1]
+            sample = self.samples[self.last_timestamp]
         else:
             sample = self.samples[timestamp]
         return sample
@@ -718,34 +857,41 @@ class Job:
             if 'running' in prefix:
                 fname = '{}_{}.pickled'   .format(self.username,self.jobid)
             else:
-                fname = '{}_{}_{}.pickled'.format(self.username,self.jobid,self.timestamps()[-1])
+                fname = '{}_{}_{}.pickled'.format(self.username,self.jobid,self.last_timestamp)
             
             if compressed:
                 fpath = os.path.join(prefix,fname+'.gz')
-                fo = gzip.open(fpath,'wb') 
+                # level 1 is several times faster than the default (9) and the
+                # pickles are small enough that the size difference is marginal.
+                fo = gzip.open(fpath,'wb',compresslevel=1)
             else:
-                fo =      open(fpath,'wb')                
-            # remove the "upward" object references in the data tree
-            # otherwise they waste a lot of disk space
-            sampler = self.sampler 
-            self.sampler = None
-            # job_sample.parent_job
-            for job_sample in self.samples.values():
-                job_sample.parent_job = None
-            # pickle this job                
-            pickle.dump(self,fo)
-            # finally restore the upward references
-            self.sampler = sampler
-            # job_sample.parent_job
-            for job_sample in self.samples.values():
-                job_sample.parent_job = self
-            
+                fpath = os.path.join(prefix,fname)
+                fo =      open(fpath,'wb')
+            # the "upward" object references (job.sampler, job_sample.parent_job)
+            # are stripped by the __getstate__ methods, so the job can be dumped
+            # as is, without mutating the object graph.
+            pickle.dump(self,fo,protocol=pickle.HIGHEST_PROTOCOL)
             if verbose:
                 print(' (pickled {})'.format(fpath))
             fo.close()
     #---------------------------------------------------------------------------
 
-#===============================================================================   
+#===============================================================================
+unpickle_allowed_modules = ( 'showq','qstatx','sar','script','cpus','mycollections'
+                           , 'collections','_collections','copyreg','builtins','datetime' )
+""" Modules from which classes may be restored when unpickling a report file. """
+#===============================================================================
+class RestrictedUnpickler(pickle.Unpickler):
+    """
+    Unpickler that only restores classes from :class:`unpickle_allowed_modules`
+    (our own data classes and the stdlib containers they hold). A *.pickled* file
+    in *completed/* could otherwise instantiate arbitrary classes on load.
+    """
+    def find_class(self,module,name):
+        if module.split('.',1)[0] in unpickle_allowed_modules:
+            return super().find_class(module,name)
+        raise pickle.UnpicklingError('unpickling {}.{} is not allowed'.format(module,name))
+#===============================================================================
 def unpickle(fpath,sampler=None,verbose=False):
     """
     Counterpart of Job.pickle()
@@ -755,17 +901,23 @@ def unpickle(fpath,sampler=None,verbose=False):
     :param bool verbose: print the filename of the unpickled file.
     :return: a Job object or :class:`None` if the file does not exist.
     """        
+    # The report files are memory-mapped: the OS pages in just the bytes the
+    # unpickler asks for, without Python-level buffered reads, and the page
+    # cache is shared by successive refreshes of the same file.
     if fpath.endswith('.pickled.gz'):
         try:
-            with gzip.open(fpath,'rb') as fo:
-                job = pickle.load(fo)
+            with open(fpath,'rb') as fo:
+                with mmap.mmap(fo.fileno(),0,access=mmap.ACCESS_READ) as mm:
+                    with gzip.GzipFile(fileobj=mm) as fz:
+                        job = RestrictedUnpickler(fz).load()
         except:
             job = None
-                    
+
     elif fpath.endswith('.pickled'):
         try:
             with open(fpath,'rb') as fo:
-                job = pickle.load(fo)
+                with mmap.mmap(fo.fileno(),0,access=mmap.ACCESS_READ) as mm:
+                    job = RestrictedUnpickler(mm).load()
         except:
             job = None
     else:
@@ -789,7 +941,7 @@ def unpickle(fpath,sampler=None,verbose=False):
         job.sampler = sampler
         # job_sample.parent_job
         for job_sample in job.samples.values():
-            job_sample.parent_job = job                
+            job_sample.parent_job = weakref.proxy(job)
     return job
 #===============================================================================   
 class Sampler:
@@ -808,18 +960,114 @@ class Sampler:
             self.sampling_interval = interval
         self.qMainWindow = qMainWindow
             
-        self.overviews = OrderedDict()      # {timestamp:job_overview}
+        self.overviews = {}                 # {timestamp:[overview lines]}
+        self._overview_strings = {}         # {timestamp:overview text}, cache, see overview_text()
         self.jobs    = {}                   # {jobid    :Job object  }
         self.timestamps = []                # [datetime.strftime(timestamp_format)]
-        self.timestamp_jobs = OrderedDict() # {timestamp:[jobids]}
-        self.jobids_running_previous = []
-    #---------------------------------------------------------------------------    
+        self.timestamp_jobs = defaultdict(list) # {timestamp:[jobids]}
+        self.jobids_running_previous = set()
+        self.total_nodes_in_use = ''        # set once per sample
+        self._showq_prefetch = None         # pending showq query, see prefetch_showq()
+        self.qstat_cache = {}               # {jobid    :Data_qstat }, refreshed every sample
+        self._offline_file_stats = {}       # {filename :(mtime,size)} of the last offline fetch
+        self.qstat_refreshed = -Cfg.qstat_ttl # monotonic time of the last refresh
+        self.neighbour_cache = {}           # {(mhost,timestamp):{jobid:(nnodes,ncores,effic,memory)}}
+    #---------------------------------------------------------------------------
+    def __getstate__(self):
+        # ojm_cron pickles the sampler after every run - a pending prefetch
+        # (a thread) cannot be pickled, drop it.
+        state = self.__dict__.copy()
+        state['_showq_prefetch'] = None
+        return state
+    #---------------------------------------------------------------------------
+    def __setstate__(self,state):
+        self.__dict__.update(state)
+        self._showq_prefetch = None
+        # samplers pickled by older versions stored some attributes in other
+        # formats (list instead of set, OrderedDict instead of defaultdict,
+        # joined overview text instead of line lists) or not at all - coerce
+        # and default them so the first sample() after an upgrade works.
+        self.jobids_running_previous = set( getattr(self,'jobids_running_previous',()) )
+        timestamp_jobs = defaultdict(list)
+        timestamp_jobs.update( getattr(self,'timestamp_jobs',{}) )
+        self.timestamp_jobs = timestamp_jobs
+        self.__dict__.setdefault('overviews'          ,{})
+        self.__dict__.setdefault('_overview_strings'  ,{})
+        self.__dict__.setdefault('total_nodes_in_use' ,'')
+        self.__dict__.setdefault('qstat_cache'        ,{})
+        self.__dict__.setdefault('qstat_refreshed'    ,-Cfg.qstat_ttl)
+        self.__dict__.setdefault('neighbour_cache'    ,{})
+        self.__dict__.setdefault('_offline_file_stats',{})
+        for timestamp,overview in self.overviews.items():
+            if isinstance(overview,str):
+                self._overview_strings[timestamp] = overview
+                self.overviews[timestamp] = []
+        # Job.__getstate__ and JobSample.__getstate__ drop their sampler and
+        # parent_job references - reattach them, as unpickle() does for
+        # report files.
+        for job in self.jobs.values():
+            job.sampler = self
+            for job_sample in job.samples.values():
+                if job_sample.parent_job is None:
+                    job_sample.parent_job = weakref.proxy(job)
+    #---------------------------------------------------------------------------
+    showq_command = "showq -r -p hopper --xml"
+    #---------------------------------------------------------------------------
+    def prefetch_showq(self):
+        """
+        Issue the showq query on a daemon thread, to be picked up by
+        :func:`collect_showq`. A daemon thread (rather than an executor)
+        cannot block interpreter exit when ojm_cron quits while the query is
+        still in its retry loop.
+        """
+        box = []
+        def fetch():
+            box.append( remote.run(self.showq_command,post_processor=remote.xml_to_odict) )
+        thread = threading.Thread(target=fetch,daemon=True)
+        thread.start()
+        self._showq_prefetch = (monotonic(),thread,box)
+    #---------------------------------------------------------------------------
+    def collect_showq(self):
+        """
+        Return the output of the prefetched showq query, or of a fresh query
+        if no prefetch is pending or the prefetched result was issued more
+        than *Cfg.qstat_ttl* seconds ago - the showq state must describe now,
+        not the previous sampling interval.
+        """
+        prefetch = self._showq_prefetch
+        self._showq_prefetch = None
+        if prefetch is not None:
+            issued,thread,box = prefetch
+            if monotonic()-issued <= Cfg.qstat_ttl:
+                thread.join()
+                if box:
+                    return box[0]
+        return remote.run(self.showq_command,post_processor=remote.xml_to_odict)
+    #---------------------------------------------------------------------------
     def sample(self,verbose=False,show_progress=False):
         """
-        Sample the running jobs online (locally). 
+        Sample the running jobs online (locally).
         """
-        self.data_showq = remote.run("showq -r -p hopper --xml",post_processor=remote.xml_to_odict)
-        self.total_nodes_in_use = self.get_total_nodes_in_use()
+        # collect the showq output: the previous sample() call prefetched it
+        # during pass 2, on the first call issue the query now - on a worker
+        # thread, so the local bookkeeping below overlaps the ssh round-trip.
+        if self._showq_prefetch is None:
+            self.prefetch_showq()
+        os.makedirs('completed', exist_ok=True)
+        timestamp = get_timestamp_now()
+        if Cfg.offline:
+            os.makedirs ('running',exist_ok=True)
+            if os.path.exists('running/timestamp'):
+                os.remove('running/timestamp')
+            #   if ths file is absent ojm is sampling.
+            print(title_line(timestamp, char='=', width=100, above=True, below=True),end='')
+        self.data_showq = self.collect_showq()
+        try:
+            cluster = self.data_showq['Data']['cluster']
+            self.total_nodes_in_use = 'nodes in use: {}/{}'.format( cluster['@LocalActiveNodes']
+                                                                  , cluster['@LocalConfigNodes'] )
+        except (TypeError,KeyError):
+            self.total_nodes_in_use = ''
         # get the job entries
         try:
             job_entries = self.data_showq['Data']['queue']['job']
@@ -828,24 +1076,24 @@ class Sampler:
             exit(0)
         # remove jobs
         #  . which have no mhost set
+        #  . which are not in state 'Running'
         #  . which have jobid like '390326[1]' (=job array jobs)
         job_entries_filtered = []
         for job_entry in job_entries:
-            converted = ShowqJobEntry(job_entry)
-            
+            # the tests run on the raw parsed dict, so no ShowqJobEntry (with
+            # its int/float promotions) is constructed for discarded entries.
             # ignore jobs with unknow mhost
-            try:
-                converted.get_mhost()
-            except KeyError:
-                print('ignoring',converted.get_jobid_long(), '(mhost unknown)')
+            if '@MasterHost' not in job_entry:
+                print('ignoring',job_entry.get('@DRMJID','?'), '(mhost unknown)')
+                continue
+            # we only analyze running jobs
+            if job_entry['@State'] != 'Running':
                 continue
-            
             # ignore jobs with jobid containing '[n]'
-            jobid = converted.get_jobid()
-            if '[' in jobid:
-                print('ignoring',job_entry.get_jobid_long(), '(worker job)')
-                continue    
-            job_entries_filtered.append(converted)
+            if '[' in job_entry['@JobID']:
+                print('ignoring',job_entry['@DRMJID'], '(worker job)')
+                continue
+            job_entries_filtered.append( ShowqJobEntry(job_entry) )
         job_entries = job_entries_filtered
         
         self.n_entries   = len(job_entries)
@@ -856,7 +1104,7 @@ class Sampler:
             hdr = 'Sampling #{} : {} {}/{}'
         else:
             if show_progress:
-                from progress import printProgress
+                from progress import printProgress,printProgressAsync,flushProgress
                 hdr = 'sampling showq #{}'.format(len(self.timestamp_jobs)+1)
             
         # create 
@@ -864,113 +1112,155 @@ class Sampler:
         #   . a list wit all uncompleted jobids
         # the latter is compared to the jobid list of the previous sample to find
         # out which jobs are finished.
-        self.mhost_jobs = OrderedDict()
+        self.mhost_jobs = defaultdict(list)
         self.jobids_running = []
         for job_entry in job_entries:
             mhost = job_entry.get_mhost()
             jobid = job_entry.get_jobid()
-            od_add_list_item(self.mhost_jobs,mhost,jobid)
+            self.mhost_jobs[mhost].append(jobid)
             self.jobids_running.append(jobid)
-            try:
-                self.jobids_running_previous.remove(jobid)
-            except ValueError:
-                pass
-            #   when this loop has completed, self.jobids_running_previous 
-            #   contains only jobides of finished jobs.
-        jobids_finished = self.jobids_running_previous
-        self.jobids_running_previous = self.jobids_running # prepare for next sample() call
+        #   the finished jobs are the ones that were running last sample but
+        #   not anymore - a set difference instead of a remove() per entry.
+        jobids_running = set(self.jobids_running)
+        jobids_finished = list( self.jobids_running_previous - jobids_running )
+        self.jobids_running_previous = jobids_running # prepare for next sample() call
         # pickle finished jobs (if they had issues) and remove them from self.jobs
-        os.makedirs('completed', exist_ok=True)
+        finished_jobs = []
         for jobid in jobids_finished:
             try:
-                job = self.jobs.pop(jobid)
+                finished_jobs.append( self.jobs.pop(jobid) )
             except KeyError:
                 continue
-            job.pickle('completed/',verbose=True)
-            if Cfg.offline:
-                job.remove_file()
-        timestamp = get_timestamp_now()
-        if Cfg.offline:
-            os.makedirs ('running',exist_ok=True)
-            if os.path.exists('running/timestamp'):
-                os.remove('running/timestamp') 
-            #   if ths file is absent ojm is sampling. 
-            print(title_line(timestamp, char='=', width=100, above=True, below=True),end='')
-            
-        # loop over the running jobs (job_entries) 
+        if finished_jobs:
+            # gzip releases the GIL while compressing, so pickling the finished
+            # jobs on a thread pool overlaps compression and disk writes.
+            def pickle_finished_job(job):
+                job.pickle('completed/',verbose=True)
+                if Cfg.offline:
+                    job.remove_file()
+            with ThreadPoolExecutor(max_workers=os.cpu_count()) as executor:
+                list( executor.map(pickle_finished_job,finished_jobs) )
+
+        # fetch the qstat output of all running jobs with a single call,
+        # so that pass 1 below does not spawn one qstat per job.
+        self.refresh_qstat()
+        # only the current timestamp is ever queried, so drop last tick's entries.
+        self.neighbour_cache.clear()
+
+        # loop over the running jobs (job_entries)
         #pass 1 create jobs and job samples
+        #   the progress indicators only need a few refreshes per second:
+        #   processEvents pumps the whole Qt event queue and printProgress
+        #   writes to the terminal, so both are throttled.
+        progress_every = max(1, self.n_entries//100)
+        last_ui = monotonic()
         for i_entry,job_entry in enumerate(job_entries):
-            if job_entry.get_state() != 'Running':
-                continue # we only analyze running jobs
             jobid    = job_entry.get_jobid()
             #username = job_entry.get_username()
-            od_add_list_item(self.timestamp_jobs,timestamp,jobid)
-                        
+            self.timestamp_jobs[timestamp].append(jobid)
+
             if self.qMainWindow:
-                progress_message = hdr.format(len(self.timestamp_jobs),jobid,i_entry,self.n_entries)
-                dlg.setLabelText(progress_message)
-                dlg.setValue(i_entry)
-                QApplication.processEvents()
+                now = monotonic()
+                if now - last_ui > 0.05:
+                    last_ui = now
+                    progress_message = hdr.format(len(self.timestamp_jobs),jobid,i_entry,self.n_entries)
+                    dlg.setLabelText(progress_message)
+                    dlg.setValue(i_entry)
+                    QApplication.processEvents()
             else:
-                if show_progress:                
-                    printProgress(i_entry, self.n_entries, prefix=hdr, suffix='jobid='+jobid, decimals=-1)
-                
+                if show_progress and i_entry%progress_every==0:
+                    printProgressAsync(i_entry, self.n_entries, prefix=hdr, suffix='jobid='+jobid, decimals=-1)
+
             job = self.jobs.get(jobid,None)
             if job is None:
                 # this job is encountered for the first time
                 job = Job(timestamp,job_entry,self)
                 self.jobs[jobid] = job 
             else:
-                job.add_sample(job_entry,timestamp)
                 if job.sampler is None:
-                    remote.err_print('### strange')
+                    # can only happen for jobs restored by an old unpickler -
+                    # reattach before add_sample, so it finds the qstat cache.
                     job.sampler = self
+                job.add_sample(job_entry,timestamp)
         
         if self.qMainWindow:
-            # terminate QProgressDialog
+            # complete pass 1 and reuse the dialog for pass 2 - constructing
+            # a new QProgressDialog per pass is expensive and makes it flicker.
             dlg.setValue(self.n_entries)
             QApplication.processEvents()
-            # start new QProgressDialog
-            dlg = QProgressDialog('','',0, self.n_entries,self.qMainWindow)
+            dlg.setValue(0)
             hdr = 'Checking rules #{} : {} {}/{}'
         else:
-            if show_progress:                
-                # terminate printProgress            
+            if show_progress:
+                # terminate printProgress
+                flushProgress()
                 printProgress(self.n_entries, self.n_entries, prefix=hdr, suffix='', decimals=-1)
-                # start new printProgress            
+                # start new printProgress
                 hdr = 'Checking rules #{}'.format(len(self.timestamp_jobs)+1)
                 
+        # prefetch the next sample's showq output while pass 2 does its work;
+        # if the sampling interval outlives Cfg.qstat_ttl the result is
+        # discarded by collect_showq() and the next call queries again.
+        self.prefetch_showq()
+
         #pass 2 add NeighbouringJobInfo and check the rules
+        #   only the jobs of the current sample are checked - jobs that are no
+        #   longer running cannot have new issues for this timestamp.
         overview = [] # one warning per job with issues, jobs without issues are skipped
-        i_entry = 0
-        for jobid,job in self.jobs.items():
-            #progress
-            if self.qMainWindow:
-                progress_message = hdr.format(len(self.timestamp_jobs),jobid,i_entry,self.n_entries)
-                dlg.setLabelText(progress_message)
-                dlg.setValue(i_entry)
-                QApplication.processEvents()
-            else:
-                if show_progress:                
-                    printProgress(i_entry, self.n_entries, prefix=hdr, suffix='jobid='+jobid, decimals=-1)
-            i_entry += 1
-            #the real work
-            overview_line = job.check_for_issues(timestamp)
-            if overview_line:
-                overview.append(overview_line)
-                if verbose:
-                    print('\n'+timestamp+'\n')
-                    print(job.get_details(timestamp))
-                if Cfg.offline:
-                    job.pickle('running', verbose=verbose)
-                    
+        if self.qMainWindow:
+            # Qt widgets must be driven from the gui thread - keep this path serial.
+            i_entry = 0
+            last_ui = monotonic()
+            for jobid in self.jobids_running:
+                job = self.jobs[jobid]
+                #progress (throttled, see pass 1)
+                now = monotonic()
+                if now - last_ui > 0.05:
+                    last_ui = now
+                    progress_message = hdr.format(len(self.timestamp_jobs),jobid,i_entry,self.n_entries)
+                    dlg.setLabelText(progress_message)
+                    dlg.setValue(i_entry)
+                    QApplication.processEvents()
+                i_entry += 1
+                #the real work
+                overview_line = job.check_for_issues(timestamp)
+                if overview_line:
+                    overview.append(overview_line)
+                    if verbose:
+                        print('\n'+timestamp+'\n')
+                        print(job.get_details(timestamp))
+                    if Cfg.offline:
+                        job.pickle('running', verbose=verbose)
+        else:
+            # the jobs are independent and mostly wait on remote commands and
+            # disk writes, so check them on a thread pool.
+            overview_lock = threading.Lock()
+            def check_job(job):
+                overview_line = job.check_for_issues(timestamp)
+                if overview_line:
+                    with overview_lock:
+                        overview.append(overview_line)
+                    if verbose:
+                        print('\n'+timestamp+'\n')
+                        print(job.get_details(timestamp))
+                    if Cfg.offline:
+                        job.pickle('running', verbose=verbose)
+            with ThreadPoolExecutor(max_workers=min(32,max(1,len(self.jobids_running)))) as executor:
+                futures = { executor.submit(check_job,self.jobs[jobid]):jobid for jobid in self.jobids_running }
+                for i_entry,future in enumerate(as_completed(futures)):
+                    if show_progress and i_entry%progress_every==0:
+                        printProgressAsync(i_entry, self.n_entries, prefix=hdr, suffix='jobid='+futures[future], decimals=-1)
+                    future.result()
+
         if self.qMainWindow:
             # terminate QProgressDialog
             dlg.setValue(self.n_entries)
             QApplication.processEvents()
+            dlg.close()
         else:
-            if show_progress:                
+            if show_progress:
                 # terminate printProgress
+                flushProgress()
                 printProgress(self.n_entries, self.n_entries, prefix=hdr, suffix='', decimals=-1)
             for line in overview:
                 print(line,end='')
@@ -982,30 +1272,79 @@ class Sampler:
             with open('running/timestamp','w') as f:
                 f.write(timestamp)
 
-        self.overviews[timestamp] = self.overview_list2str(overview)
-        
+        self.overviews[timestamp] = overview
+        self._overview_strings[timestamp] = self.overview_list2str(overview)
+
         self.timestamps.append(timestamp)
         #    this must be the last statement because the gui otherwise sees a timestamp which is not ready.
         return timestamp
     #---------------------------------------------------------------------------
+    def refresh_qstat(self):
+        """
+        Query the batch server once for all running jobs (a single
+        'qstat -x -f <jobid1> <jobid2> ...') and store the parsed blocks as
+        :class:`Data_qstat` objects in *self.qstat_cache*. This reduces the
+        number of qstat calls per sample from one per job to one per sample.
+
+        The cache has a time to live of *Cfg.qstat_ttl* seconds: a refresh
+        request within that window (e.g. an extra sample triggered from the
+        gui) is served from the cache without querying the batch server again.
+        """
+        now = monotonic()
+        if self.qstat_cache and (now - self.qstat_refreshed) < Cfg.qstat_ttl:
+            return
+        self.qstat_refreshed = now
+        self.qstat_cache = {}
+        if not self.jobids_running:
+            return
+        for jobid,job_block in run_qstat_f_all(self.jobids_running).items():
+            try:
+                self.qstat_cache[jobid] = Data_qstat(jobid,data=job_block)
+            except KeyError:
+                # e.g. no exec_host (yet) - JobSample falls back to a per-job qstat.
+                pass
+    #---------------------------------------------------------------------------
+    def neighbour_metrics(self,mhost,timestamp):
+        """
+        Return {jobid:(nnodes,ncores,effic,memory)} for all jobs running on
+        *mhost* at *timestamp*, computed once per (mhost,timestamp). A job
+        without a sample at *timestamp* maps to *None*.
+
+        Every job on a host asks for the metrics of all its neighbours (see
+        :class:`NeighbouringJobInfo`); without this cache a host with K jobs
+        computes them K times.
+        """
+        key = (mhost,timestamp)
+        metrics = self.neighbour_cache.get(key)
+        if metrics is None:
+            metrics = {}
+            for jobid in self.mhost_jobs[mhost]:
+                job = self.jobs[jobid]
+                try:
+                    sample = job.get_sample(timestamp)
+                except KeyError as e:
+                    print(type(e),e,job)
+                    metrics[jobid] = None
+                else:
+                    metrics[jobid] = ( sample.get_nnodes()
+                                     , sample.get_ncores()
+                                     , sample.get_effic ()
+                                     , sample.get_mem   ()
+                                     )
+            self.neighbour_cache[key] = metrics
+        return metrics
+    #---------------------------------------------------------------------------
     def get_total_nodes_in_use(self):
         """
-        :return: a str describing the fraction of nodes in use. 
+        :return: a str describing the fraction of nodes in use.
+
+        The str is formatted once per sample, when the showq output arrives.
         """
-        if hasattr(self,'data_showq'):
-            s = 'nodes in use: {}/{}'.format( self.data_showq['Data']['cluster']['@LocalActiveNodes']
-                                            , self.data_showq['Data']['cluster']['@LocalConfigNodes'] )
-            self.total_nodes_in_use = s
-            return s
-        else:
-            if hasattr(self,'total_nodes_in_use'):
-                return self.total_nodes_in_use
-            else:
-                return ''
+        return self.total_nodes_in_use
     #---------------------------------------------------------------------------
     def get_remote_timestamp(self):
         """
-        :return: the last sample's timestamp from the offline job monitor. If ojm.py is in the process of sampling an empty string is returned. 
+        :return: the last sample's timestamp from the offline job monitor. If ojm.py is in the process of sampling an empty string is returned.
         """
         try:
             lines = remote.run('cd data/jobmonitor/running/; cat timestamp',post_processor=remote.list_of_lines)
@@ -1013,40 +1352,83 @@ class Sampler:
         except:
             return ''
     #---------------------------------------------------------------------------
+    def get_remote_timestamp_and_filenames(self):
+        """
+        :return: the last sample's timestamp from the offline job monitor and
+          a dict {filename:(mtime,size)} of its sample files, fetched in a
+          single remote command (one round-trip instead of two). The timestamp
+          is the empty string while ojm.py is in the process of sampling.
+        """
+        section_separator = '===TIMESTAMP==='
+        command = "cd data/jobmonitor/running/ && cat timestamp 2>/dev/null ; echo {} ; stat -c '%n %Y %s' *.pickled.gz 2>/dev/null".format(section_separator)
+        try:
+            lines = remote.run(command,post_processor=remote.list_of_non_empty_lines)
+            i = lines.index(section_separator)
+            timestamp = lines[0] if i==1 else ''
+            file_stats = {}
+            for line in lines[i+1:]:
+                filename,mtime,size = line.rsplit(' ',2)
+                file_stats[filename] = (mtime,size)
+            return timestamp, file_stats
+        except:
+            return '',{}
+    #---------------------------------------------------------------------------
     def fetch_offline_samples(self):
         """
         Sample the running jobs from the offline job monitor. The remote directory '~/data/jobmonitor/running'
         examined to see if there are new samples available. These are copied to the local directory ./offline/running
         """
-        shutil.rmtree('offline/running')
+        if not self._offline_file_stats:
+            # first fetch of this session: start from a clean local directory
+            shutil.rmtree('offline/running',ignore_errors=True)
         os.makedirs('offline/running'  ,exist_ok=True)
         #os.makedirs('offline/completed',exist_ok=True)
-        timestamp = self.get_remote_timestamp()
+        timestamp,file_stats = self.get_remote_timestamp_and_filenames()
+        #   while ojm.py is sampling the timestamp file is absent - retry with
+        #   exponential backoff (2s .. 60s) instead of a fixed minute.
+        delay = 2
         while not timestamp:
-            sleep(60)
-            timestamp = self.get_remote_timestamp()
+            sleep(delay)
+            delay = min(60, 1.5*delay)
+            timestamp,file_stats = self.get_remote_timestamp_and_filenames()
         if self.timestamps:
             if timestamp==self.timestamps[-1]:
                 return # this timestamp is already in the samples
-        self.timestamps.append(timestamp)
-        filenames = remote.glob('*.pickled.gz','data/jobmonitor/running/')
         self.n_entries = 0
-        for filename in filenames:
-            if not filename: # empty line
-                continue
-            lfname =         'offline/running/'+filename
-            rfname = 'data/jobmonitor/running/'+filename
-            print('copying '+rfname,'to',lfname,end='')
+        # incremental sync: only files whose remote mtime/size changed since
+        # the previous fetch are downloaded, files that disappeared remotely
+        # are removed locally.
+        old_stats = self._offline_file_stats
+        changed = [ filename for filename,stat in file_stats.items()
+                    if old_stats.get(filename)!=stat
+                  ]
+        if changed:
+            # fetch the changed files in one streamed tar archive, instead of
+            # one sftp round-trip per file.
             try:
-                remote.copy_remote_to_local(lfname,rfname)
-                print(' - copied')
-            except:
-                print(' - failed')
-                continue
+                remote.bulk_copy_remote_to_local('data/jobmonitor/running','offline/running',' '.join(changed))
+            except Exception as e:
+                # nothing has been recorded for this timestamp yet, so the
+                # next call simply retries the fetch.
+                remote.err_print(type(e),e)
+                return
+        #   only now that the download succeeded is the local mirror brought
+        #   in line with the remote state - a failed sync leaves both the
+        #   files and _offline_file_stats as they were.
+        for filename in set(old_stats) - set(file_stats):
+            try:
+                os.remove('offline/running/'+filename)
+            except OSError:
+                pass
+        self._offline_file_stats = file_stats
+        #   the sample is only recorded once its files arrived - a timestamp
+        #   without overview would crash the dashboard.
+        self.timestamps.append(timestamp)
+        for filename in file_stats:
             job = unpickle('offline/running/'+filename,sampler=self)
             self.add_offline_job(job)
             self.n_entries += 1
-        self.overviews[timestamp] = self.overview_list2str(self.overviews[timestamp])
+        self._overview_strings[timestamp] = self.overview_list2str( self.overviews.setdefault(timestamp,[]) )
     #---------------------------------------------------------------------------
 #     def timestamp(self,i=-1):
 #         return self.timestamps[i]
@@ -1062,7 +1444,21 @@ class Sampler:
         s = self.get_total_nodes_in_use()
         if s:
             text+= ', '+s
-        text+= ''.join(overview_list) 
+        text+= ''.join(overview_list)
+        return text
+    #---------------------------------------------------------------------------
+    def overview_text(self,timestamp):
+        """
+        :return: the overview of sample *timestamp* as plain text.
+
+        The overviews are stored as lists of lines; the joined text is
+        materialized once per timestamp and cached until new lines arrive
+        for that timestamp.
+        """
+        text = self._overview_strings.get(timestamp)
+        if text is None:
+            text = self.overview_list2str( self.overviews[timestamp] )
+            self._overview_strings[timestamp] = text
         return text
     #---------------------------------------------------------------------------
     def nsamples(self):
@@ -1077,22 +1473,13 @@ class Sampler:
         """
         self.jobs[job.jobid] = job
         for timestamp,job_sample in job.samples.items():
-            od_add_list_item(self.timestamp_jobs,timestamp,job.jobid)
+            self.timestamp_jobs[timestamp].append(job.jobid)
             overview_line = job_sample.compose_overview()
             if not timestamp in self.overviews:
                 self.overviews[timestamp] = [overview_line]
             else:
-                overview = self.overviews[timestamp] 
-                if isinstance(overview,str):
-                    lines = overview.split('\n')
-                    self.overviews[timestamp] = []
-                    overview = self.overviews[timestamp]
-                    for line in lines:
-                        if not line.endswith('\n'):
-                            line += '\n'
-                        overview.append(line)
-                overview.append(overview_line)   
-        self.total_nodes_in_use = job.sampler.get_total_nodes_in_use()
+                self.overviews[timestamp].append(overview_line)
+            self._overview_strings.pop(timestamp,None) # text is stale now
     #---------------------------------------------------------------------------
     def when_done_adding_offline_jobs(self):
         """
@@ -24,7 +24,7 @@ class Data_tracejob:
     def __init__(self,jobid):
         self.jobid = jobid
         # use only accounting files
-        command = 'ssh mn.hopper tracejob -slmq -n 10 {}'.format(jobid)
+        command = '{} mn.hopper tracejob -slmq -n 10 {}'.format(remote.ssh,jobid)
         self.lines = remote.run(command,post_processor=remote.list_of_non_empty_lines)
         if not self.lines:
             remote.err_print('Failed ',command)